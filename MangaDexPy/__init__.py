@@ -1,16 +1,34 @@
 import requests
 import json
 import time
-from typing import List, Dict, Union, Type
+import base64
+import logging
+import threading
+from datetime import datetime
+from typing import List, Dict, Union, Type, Iterator, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from .manga import Manga, MangaTag
 from .chapter import Chapter
 from .group import Group
 from .user import User
 from .author import Author
 from .cover import Cover
-from .network import NetworkChapter
+from .network import NetworkChapter, NodeManager, NetworkReporter
 from .search import SearchMapping
-
+from .entity import EntityMap, resolve
+from .decoding import loads
+from .metrics import Hooks, Metrics
+from .ratelimit import RateLimiter, TokenBucket
+from .cache import ResponseCache
+from .singleflight import SingleFlight
+from . import transport
+
+logger = logging.getLogger(__name__)
+
+SESSION_LIFETIME = 15 * 60
+TRANSPORT_OPTIONS = {"pool_size": 32, "hosts": 32, "keep_alive": True, "api_retries": 2, "node_retries": 1,
+                     "http2": False}
 INCLUDE_ALL = ["cover_art", "manga", "chapter", "scanlation_group", "author", "artist", "user", "leader", "member"]
 
 
@@ -49,31 +67,180 @@ class MangaDex:
     def __init__(self):
         self.api = "https://api.mangadex.org"
         self.net_api = "https://api.mangadex.network"
-        self.session = requests.Session()
-        self.session.headers["Authorization"] = ""
+        self.uploads = "https://uploads.mangadex.org"
         self.login_success = False
         self.session_token = None
         self.refresh_token = None
-        self.rate_limit = 0.25
+        self.session_expires = 0.0
+        self.refresh_margin = 60
+        self.limiter = RateLimiter()
+        self.max_retries = 3
+        self.page_workers = 1
+        self.offset_window = 10000
+        self.cache = None
+        self.image_cache = None
+        self.coalesce = True
+        self.entities = EntityMap()
+        self.hooks = Hooks()
+        self.nodes = NodeManager()
         self.constants = {"INCLUDE_ALL": INCLUDE_ALL}
+        self.transport_options = dict(TRANSPORT_OPTIONS)
+        self._init_transport()
+
+    def _init_transport(self):
+        """Sets up the HTTP session and what depends on the concurrency model: locks, coalescing and reporting."""
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = ""
+        self.auth_lock = threading.Lock()
+        self.flights = SingleFlight()
+        self.reporter = NetworkReporter(self)
+        self.configure_transport()
+
+    @property
+    def rate_limit(self) -> float:
+        """Minimum delay between two API calls, backed by the limiter's API bucket."""
+        bucket = self.limiter.buckets.get("api")
+        return 1 / bucket.rate if bucket and bucket.rate else 0
+
+    @rate_limit.setter
+    def rate_limit(self, value: float):
+        bucket = self.limiter.buckets.get("api")
+        if bucket is None:
+            bucket = self.limiter.buckets["api"] = TokenBucket(None)
+        bucket.rate = 1 / value if value else None
+        bucket.capacity = 1
+
+    def configure_transport(self, pool_size: int = None, hosts: int = None, keep_alive: bool = None,
+                            api_retries: int = None, node_retries: int = None, http2: bool = None):
+        """Sets up connection pooling for the session: pool_size connections for the API and for each of up to
+        `hosts` other hosts, TCP keep-alive, and retries of connection errors (plus 502, 503 and 504 responses
+        for the API). With http2, requests are multiplexed over HTTP/2 connections, which requires httpx.
+        Arguments left out keep their current value, starting from TRANSPORT_OPTIONS.
+        Must be called again if the API URL is changed."""
+        options = {"pool_size": pool_size, "hosts": hosts, "keep_alive": keep_alive, "api_retries": api_retries,
+                   "node_retries": node_retries, "http2": http2}
+        self.transport_options.update({k: v for k, v in options.items() if v is not None})
+        transport.mount(self.session, self.api, **self.transport_options)
+
+    def _route(self, url: str) -> str:
+        if url.startswith(self.api):
+            return "at-home" if url.startswith(f"{self.api}/at-home/") else "api"
+        if url.startswith(self.uploads):
+            return "uploads"
+        if url.startswith(self.net_api):
+            return "network"
+        return "node"
+
+    def _cache_ttl(self, method: str, url: str, kwargs: dict) -> int:
+        if self.cache is None or method != "GET" or kwargs.get("stream") or not url.startswith(self.api):
+            return 0
+        return self.cache.ttl(url[len(self.api):])
+
+    def _flight_key(self, method: str, url: str, kwargs: dict) -> Optional[tuple]:
+        """Gets the key identical requests share, or None if the request must not be shared."""
+        if not self.coalesce or method != "GET" or kwargs.get("stream") or set(kwargs) - {"params", "headers"}:
+            return None
+        return (ResponseCache.key(url, kwargs.get("params")), self.session_token,
+                tuple(sorted((kwargs.get("headers") or {}).items())))
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Sends a request. Concurrent identical GET requests share a single response."""
+        key = self._flight_key(method, url, kwargs)
+        if key is None:
+            return self._cached_request(method, url, **kwargs)
+        return self.flights.do(key, lambda: self._cached_request(method, url, **kwargs),
+                               lambda: self.hooks.emit("coalesced", url=url, route=self._route(url)))
+
+    def _cached_request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Sends a request, serving it from the response cache when possible."""
+        ttl = self._cache_ttl(method, url, kwargs)
+        if not ttl:
+            return self._send(method, url, **kwargs)
+        key = self.cache.key(url, kwargs.get("params"))
+        entry = self.cache.get(key)
+        if entry is not None and entry.fresh:
+            self.hooks.emit("cache_hit", url=url, route="api", revalidated=False)
+            return entry.to_response()
+        if entry is not None:
+            kwargs["headers"] = {**kwargs.get("headers", {}), **entry.validators()}
+        req = self._send(method, url, **kwargs)
+        if req.status_code == 304 and entry is not None:
+            self.cache.revalidate(key, ttl)
+            self.hooks.emit("cache_hit", url=url, route="api", revalidated=True)
+            return entry.to_response()
+        if req.status_code == 200:
+            self.cache.store(key, url, req.status_code, req.headers, req.content, ttl)
+        return req
+
+    def _authenticated(self, url: str) -> bool:
+        return self.login_success and url.startswith(self.api) and not url.startswith(f"{self.api}/auth/")
+
+    def _renew_session(self, stale: str):
+        """Refreshes the session token, unless another thread already replaced the stale one while this one waited."""
+        with self.auth_lock:
+            if self.session_token == stale:
+                self.refresh_session()
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Sends a request through the rate limiter, retrying when it gets rate limited.
+        The session token is refreshed when it is about to expire, or once if the API rejects it."""
+        route = self._route(url)
+        auth = self._authenticated(url)
+        if auth and time.time() > self.session_expires - self.refresh_margin:
+            self._renew_session(self.session_token)
+        attempt = 0
+        renewed = False
+        while True:
+            token = self.session_token
+            waited = self.limiter.acquire(route)
+            if waited > 0:
+                self.hooks.emit("rate_limit_wait", url=url, route=route, duration=waited)
+            self.hooks.emit("request_start", method=method, url=url, route=route, attempt=attempt)
+            start = time.monotonic()
+            req = self.session.request(method, url, **kwargs)
+            self.hooks.emit("request_end", method=method, url=url, route=route, status=req.status_code,
+                            duration=time.monotonic() - start)
+            if not kwargs.get("stream"):
+                self.hooks.emit("bytes", url=url, route=route, bytes=len(req.content))
+            self.limiter.update(route, req.status_code, req.headers)
+            if req.status_code == 401 and auth and not renewed:
+                renewed = True
+                self._renew_session(token)
+            elif req.status_code != 429 or attempt >= self.max_retries:
+                return req
+            req.close()
+            attempt += 1
+            self.hooks.emit("retry", method=method, url=url, route=route, attempt=attempt, status=req.status_code)
 
     def login(self, username: str, password: str) -> bool:
         """Logs in to MangaDex using an username and a password."""
         credentials = {"username": username, "password": password}
-        post = self.session.post(f"{self.api}/auth/login", data=json.dumps(credentials),
-                                 headers={"Content-Type": "application/json"})
+        post = self._request("POST", f"{self.api}/auth/login", data=json.dumps(credentials),
+                             headers={"Content-Type": "application/json"})
         return self._store_token(post)
 
     def login_token(self, token: str) -> bool:
         """Logs in to MangaDex using a refresh token."""
         credentials = {"token": token}
-        post = self.session.post(f"{self.api}/auth/refresh", data=json.dumps(credentials),
-                                 headers={"Content-Type": "application/json"})
+        post = self._request("POST", f"{self.api}/auth/refresh", data=json.dumps(credentials),
+                             headers={"Content-Type": "application/json"})
         return self._store_token(post)
 
     def logout(self):
-        """Resets the current session."""
-        self.__init__()
+        """Resets the current session. Transport settings, hooks, caches and rate limits are kept."""
+        self._forget_tokens()
+
+    def _forget_tokens(self):
+        self.login_success = False
+        self.session_token = None
+        self.refresh_token = None
+        self.session_expires = 0.0
+        self.session.headers["Authorization"] = ""
+
+    def close(self):
+        """Sends pending MD@H reports, stops the reporter thread and closes the HTTP session."""
+        self.reporter.close()
+        self.session.close()
 
     def refresh_session(self, token: str = None) -> bool:
         """Refreshes the session using the refresh token."""
@@ -81,15 +248,15 @@ class MangaDex:
             raise NotLoggedInError
         token = token or self.refresh_token
         data = {"token": token}
-        post = self.session.post(f"{self.api}/auth/refresh", data=json.dumps(data),
-                                 headers={"Content-Type": "application/json"})
+        post = self._request("POST", f"{self.api}/auth/refresh", data=json.dumps(data),
+                             headers={"Content-Type": "application/json"})
         return self._store_token(post)
 
     def check_session(self) -> bool:
         """Checks if the stored Authorization token is still valid."""
-        req = self.session.get(f"{self.api}/auth/check")
+        req = self._request("GET", f"{self.api}/auth/check")
         if req.status_code == 200:
-            resp = req.json()
+            resp = loads(req.content)
             return resp["isAuthenticated"]
         else:
             raise APIError(req)
@@ -100,10 +267,11 @@ class MangaDex:
         elif not post.status_code == 200:
             raise APIError(post)
         else:
-            resp = post.json()
+            resp = loads(post.content)
             self.login_success = True
             self.session_token = resp["token"]["session"]
             self.refresh_token = resp["token"]["refresh"]
+            self.session_expires = _token_expiry(self.session_token)
             self.session.headers["Authorization"] = resp["token"]["session"]
             return True
 
@@ -113,10 +281,10 @@ class MangaDex:
         params = None
         if includes:
             params = {"includes[]": includes}
-        req = self.session.get(f"{self.api}/manga/{uuid}", params=params)
+        req = self._request("GET", f"{self.api}/manga/{uuid}", params=params)
         if req.status_code == 200:
-            resp = req.json()
-            return Manga(resp["data"], self)
+            resp = loads(req.content)
+            return resolve(Manga, resp["data"], self)
         elif req.status_code == 404:
             raise NoContentError(req)
         else:
@@ -128,10 +296,10 @@ class MangaDex:
         params = None
         if includes:
             params = {"includes[]": includes}
-        req = self.session.get(f"{self.api}/chapter/{uuid}", params=params)
+        req = self._request("GET", f"{self.api}/chapter/{uuid}", params=params)
         if req.status_code == 200:
-            resp = req.json()
-            return Chapter(resp["data"], self)
+            resp = loads(req.content)
+            return resolve(Chapter, resp["data"], self)
         elif req.status_code == 404:
             raise NoContentError(req)
         else:
@@ -140,25 +308,47 @@ class MangaDex:
     def get_chapters(self, ids: List[str], includes: list = None) -> List[Chapter]:
         """Gets chapters with specific uuids."""
         includes = INCLUDE_ALL if not includes else includes
-        chapters = []
-        sub = [ids[x:x+100] for x in range(0, len(ids), 100)]
-        _rem = len(sub)
-        for s in sub:
-            p = {"ids[]": s, "includes[]": includes}
-            req = self.session.get(f"{self.api}/chapter", params=p)
-            _rem -= 1
-            if _rem:
-                time.sleep(self.rate_limit)
-            if req.status_code == 200:
-                resp = req.json()
-                chapters += [x for x in resp["data"]]
-            elif req.status_code == 204:
+        return self._retrieve_ids(f"{self.api}/chapter", Chapter, ids, {"includes[]": includes})
+
+    def get_mangas(self, ids: List[str], includes: list = None) -> List[Manga]:
+        """Gets mangas with specific uuids."""
+        includes = INCLUDE_ALL if not includes else includes
+        return self._retrieve_ids(f"{self.api}/manga", Manga, ids, {"includes[]": includes})
+
+    def get_groups(self, ids: List[str], includes: list = None) -> List[Group]:
+        """Gets groups with specific uuids."""
+        includes = INCLUDE_ALL if not includes else includes
+        return self._retrieve_ids(f"{self.api}/group", Group, ids, {"includes[]": includes})
+
+    def get_authors(self, ids: List[str]) -> List[Author]:
+        """Gets authors with specific uuids."""
+        return self._retrieve_ids(f"{self.api}/author", Author, ids)
+
+    def get_covers(self, ids: List[str]) -> List[Cover]:
+        """Gets covers with specific uuids."""
+        return self._retrieve_ids(f"{self.api}/cover", Cover, ids)
+
+    def get_users(self, ids: List[str]) -> List[User]:
+        """Gets users with specific uuids."""
+        if not self.login_success:
+            raise NotLoggedInError
+        return self._retrieve_ids(f"{self.api}/user", User, ids)
+
+    def hydrate(self, objs: List[Union[Manga, Chapter, Group]]) -> List[Union[Manga, Chapter, Group]]:
+        """Replaces relationship ids (left when includes were not requested) with objects fetched in bulk."""
+        wanted = _relationship_ids(objs)
+        getters = {Manga: self.get_mangas, Group: self.get_groups, Author: self.get_authors, Cover: self.get_covers,
+                   User: self.get_users}
+        fetched = {}
+        for cls, ids in wanted.items():
+            if not ids or (cls is User and not self.login_success):
+                continue
+            try:
+                fetched.update({x.id: x for x in getters[cls](list(ids))})
+            except NoResultsError:
                 pass
-            else:
-                raise APIError(req)
-        if not sub or not chapters:
-            raise NoResultsError()
-        return [Chapter(x, self) for x in chapters]
+        _fill_relationships(objs, fetched)
+        return objs
 
     def get_manga_chapters(self, mg: Manga, params: dict = None, includes: list = None) -> List[Chapter]:
         """Gets chapters associated with a specific Manga."""
@@ -168,29 +358,74 @@ class MangaDex:
             params["includes[]"] = includes
         return self._retrieve_pages(f"{self.api}/manga/{mg.id}/feed", Chapter, call_limit=100, params=params)
 
+    def iter_manga_chapters(self, mg: Manga, params: dict = None, includes: list = None) -> Iterator[Chapter]:
+        """Iterates over chapters associated with a specific Manga, one page at a time."""
+        includes = INCLUDE_ALL if not includes else includes
+        params = params or {}
+        if includes:
+            params["includes[]"] = includes
+        return self._iter_pages(f"{self.api}/manga/{mg.id}/feed", Chapter, call_limit=100, params=params)
+
     def get_manga_covers(self, mg: Manga, params: dict = None) -> List[Cover]:
         """Gets covers associated with a specific Manga."""
         params = params or {}
         params["manga[]"] = mg.id
         return self._retrieve_pages(f"{self.api}/cover", Cover, call_limit=100, params=params)
 
+    def iter_manga_covers(self, mg: Manga, params: dict = None) -> Iterator[Cover]:
+        """Iterates over covers associated with a specific Manga, one page at a time."""
+        params = params or {}
+        params["manga[]"] = mg.id
+        return self._iter_pages(f"{self.api}/cover", Cover, call_limit=100, params=params)
+
     def get_cover(self, uuid: str) -> Cover:
         """Gets a cover with a specific uuid."""
-        req = self.session.get(f"{self.api}/cover/{uuid}")
+        req = self._request("GET", f"{self.api}/cover/{uuid}")
         if req.status_code == 200:
-            resp = req.json()
-            return Cover(resp["data"], self)
+            resp = loads(req.content)
+            return resolve(Cover, resp["data"], self)
         elif req.status_code == 404:
             raise NoContentError(req)
         else:
             raise APIError(req)
 
+    def get_cover_image(self, cover: Cover, size: int = None) -> bytes:
+        """Downloads a cover image, in its original size or as a 512 or 256 pixels wide thumbnail.
+        Images are served from the image cache when one is set."""
+        url = _cover_url(cover, size)
+        if self.image_cache is not None:
+            data = self.image_cache.get(cover.parent_manga, cover.file, size)
+            if data is not None:
+                self.hooks.emit("cache_hit", url=url, route=self._route(url), revalidated=False)
+                return data
+        req = self._request("GET", url)
+        if req.status_code == 200:
+            if self.image_cache is not None:
+                self.image_cache.store(req.content, cover.parent_manga, cover.file, size)
+            return req.content
+        elif req.status_code == 404:
+            raise NoContentError(req)
+        else:
+            raise APIError(req)
+
+    def get_cover_images(self, covers: List[Cover], size: int = None,
+                         workers: int = 8) -> List[Optional[bytes]]:
+        """Downloads many cover images in parallel. Images are returned in the same order as the covers,
+        with None for the covers whose image does not exist."""
+        def fetch(cover):
+            try:
+                return self.get_cover_image(cover, size)
+            except NoContentError:
+                return None
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(fetch, covers))
+
     def read_chapter(self, ch: Chapter, force_443: bool = False) -> NetworkChapter:
         """Pulls a chapter from the MD@H Network."""
         data = {"forcePort443": force_443}
-        req = self.session.get(f"{self.api}/at-home/server/{ch.id}", params=data)
+        req = self._request("GET", f"{self.api}/at-home/server/{ch.id}", params=data)
         if req.status_code == 200:
-            resp = req.json()
+            resp = loads(req.content)
             return NetworkChapter(resp, ch, self)
         else:
             raise APIError(req)
@@ -198,8 +433,8 @@ class MangaDex:
     def network_report(self, url: str, success: bool, cache_header: bool, req_bytes: int, req_duration: int) -> bool:
         """Reports statistics back to the MD@H Network."""
         data = {"url": url, "success": success, "cached": cache_header, "bytes": req_bytes, "duration": req_duration}
-        req = self.session.post(f"{self.net_api}/report", data=json.dumps(data),
-                                headers={"Content-Type": "application/json"})
+        req = self._request("POST", f"{self.net_api}/report", data=json.dumps(data),
+                            headers={"Content-Type": "application/json"})
         if req.status_code == 200:
             return True
         else:
@@ -211,10 +446,10 @@ class MangaDex:
         params = None
         if includes:
             params = {"includes[]": includes}
-        req = self.session.get(f"{self.api}/group/{uuid}", params=params)
+        req = self._request("GET", f"{self.api}/group/{uuid}", params=params)
         if req.status_code == 200:
-            resp = req.json()
-            return Group(resp["data"], self)
+            resp = loads(req.content)
+            return resolve(Group, resp["data"], self)
         elif req.status_code == 404:
             raise NoContentError(req)
         else:
@@ -224,10 +459,10 @@ class MangaDex:
         """Gets an user with a specific uuid."""
         if uuid == "me" and not self.login_success:
             raise NotLoggedInError
-        req = self.session.get(f"{self.api}/user/{uuid}")
+        req = self._request("GET", f"{self.api}/user/{uuid}")
         if req.status_code == 200:
-            resp = req.json()
-            return User(resp["data"], self)
+            resp = loads(req.content)
+            return resolve(User, resp["data"], self)
         elif req.status_code == 404:
             raise NoContentError(req)
         else:
@@ -239,6 +474,12 @@ class MangaDex:
             raise NotLoggedInError
         return self._retrieve_pages(f"{self.api}/user/follows/manga", Manga, limit=limit, call_limit=100)
 
+    def iter_user_list(self, limit: int = 0) -> Iterator[Manga]:
+        """Iterates over the currently logged user's manga list, one page at a time."""
+        if not self.login_success:
+            raise NotLoggedInError
+        return self._iter_pages(f"{self.api}/user/follows/manga", Manga, limit=limit, call_limit=100)
+
     def get_user_updates(self, limit: int = 100, params: dict = None) -> List[Chapter]:
         """Gets the currently logged user's manga feed."""
         if not self.login_success:
@@ -247,12 +488,20 @@ class MangaDex:
         return self._retrieve_pages(f"{self.api}/user/follows/manga/feed", Chapter, call_limit=100,
                                     limit=limit, params=params)
 
+    def iter_user_updates(self, limit: int = 0, params: dict = None) -> Iterator[Chapter]:
+        """Iterates over the currently logged user's manga feed, one page at a time."""
+        if not self.login_success:
+            raise NotLoggedInError
+        params = params or {}
+        return self._iter_pages(f"{self.api}/user/follows/manga/feed", Chapter, call_limit=100,
+                                limit=limit, params=params)
+
     def get_author(self, uuid: str) -> Author:
         """Gets an author with a specific uuid"""
-        req = self.session.get(f"{self.api}/author/{uuid}")
+        req = self._request("GET", f"{self.api}/author/{uuid}")
         if req.status_code == 200:
-            resp = req.json()
-            return Author(resp["data"], self)
+            resp = loads(req.content)
+            return resolve(Author, resp["data"], self)
         elif req.status_code == 404:
             raise NoContentError(req)
         else:
@@ -265,10 +514,10 @@ class MangaDex:
     def transform_ids(self, obj: str, content: List[int]) -> Dict:
         """Gets uuids from legacy ids."""
         data = {"type": obj, "ids": content}
-        post = self.session.post(f"{self.api}/legacy/mapping", data=json.dumps(data),
-                                 headers={"Content-Type": "application/json"})
+        post = self._request("POST", f"{self.api}/legacy/mapping", data=json.dumps(data),
+                             headers={"Content-Type": "application/json"})
         if post.status_code == 200:
-            resp = post.json()
+            resp = loads(post.content)
             return {x["data"]["attributes"]["legacyId"]: x["data"]["attributes"]["newId"] for x in resp}
         else:
             raise APIError(post)
@@ -279,41 +528,218 @@ class MangaDex:
         m = SearchMapping(obj)
         return self._retrieve_pages(f"{self.api}{m.path}", m.object, limit=limit, call_limit=100, params=params)
 
+    def iter_search(self, obj: str, params: dict,
+                    limit: int = 0) -> Iterator[Union[Manga, Chapter, Group, Author, Cover, User]]:
+        """Searches an object, yielding results one page at a time."""
+        m = SearchMapping(obj)
+        return self._iter_pages(f"{self.api}{m.path}", m.object, limit=limit, call_limit=100, params=params)
+
     def _retrieve_pages(self, url: str, obj: Type[Union[Manga, Chapter, Group, Author, Cover]],
                         limit: int = 0, call_limit: int = 500,
                         params: dict = None) -> List[Union[Manga, Chapter, Group, Author, Cover]]:
-        params = params or {}
+        data = list(self._iter_pages(url, obj, limit=limit, call_limit=call_limit, params=params))
+        if not data:
+            raise NoResultsError()
+        return data
+
+    def _retrieve_ids(self, url: str, obj: Type[Union[Manga, Chapter, Group, Author, Cover, User]], ids: List[str],
+                      params: dict = None) -> List[Union[Manga, Chapter, Group, Author, Cover, User]]:
+        ids = list(dict.fromkeys(ids))
         data = []
-        offset = 0
-        resp = None
-        remaining = True
+        for sub in [ids[x:x+100] for x in range(0, len(ids), 100)]:
+            data += self._iter_pages(url, obj, limit=len(sub), call_limit=100, params={**(params or {}), "ids[]": sub})
+        if not data:
+            raise NoResultsError()
+        return data
+
+    def _iter_pages(self, url: str, obj: Type[Union[Manga, Chapter, Group, Author, Cover]],
+                    limit: int = 0, call_limit: int = 500,
+                    params: dict = None) -> Iterator[Union[Manga, Chapter, Group, Author, Cover]]:
+        params = params or {}
+        count = 0
         if "limit" in params:
             params.pop("limit")
         if "offset" in params:
             params.pop("offset")
-        while remaining:
-            p = {"limit": limit if limit <= call_limit and limit != 0 else call_limit, "offset": offset}
-            p = {**p, **params}
-            req = self.session.get(url, params=p)
-            if req.status_code == 200:
-                resp = req.json()
-                data += [x for x in resp["data"]]
-            elif req.status_code == 204:
-                pass
-            else:
-                raise APIError(req)
-            if limit and len(data) >= limit:
-                break
-            if resp is not None:
-                remaining = resp["total"] > offset + call_limit
-                offset += call_limit
-            else:
-                remaining = False
-            if remaining:
-                time.sleep(self.rate_limit)
-        if not data:
-            raise NoResultsError()
-        return [obj(x, self) for x in data]
+        for resp in self._iter_responses(url, params, limit, call_limit):
+            for x in resp["data"]:
+                yield resolve(obj, x, self)
+                count += 1
+                if limit and count >= limit:
+                    return
+
+    def _iter_responses(self, url: str, params: dict, limit: int, call_limit: int) -> Iterator[dict]:
+        page_limit = limit if limit <= call_limit and limit != 0 else call_limit
+        resp = self._get_page(url, {"limit": page_limit, "offset": 0, **params})
+        if resp is None:
+            return
+        end = min(resp["total"], limit) if limit else resp["total"]
+        if end > self.offset_window and self._sliceable(url):
+            yield from self._iter_slices(url, params, end)
+            return
+        yield resp
+        offsets = range(call_limit, end, call_limit)
+        if self.page_workers <= 1:
+            for offset in offsets:
+                resp = self._get_page(url, {"limit": page_limit, "offset": offset, **params})
+                if resp is None:
+                    return
+                yield resp
+            return
+        # The total is known after the first page: the remaining offsets are prefetched by a bounded pool,
+        # which goes through the rate limiter like any other call, and responses are yielded in order.
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.page_workers) as pool:
+            try:
+                for offset in offsets:
+                    if len(pending) >= self.page_workers:
+                        resp = pending.popleft().result()
+                        if resp is None:
+                            return
+                        yield resp
+                    pending.append(pool.submit(self._get_page, url,
+                                               {"limit": page_limit, "offset": offset, **params}))
+                while pending:
+                    resp = pending.popleft().result()
+                    if resp is None:
+                        return
+                    yield resp
+            finally:
+                for f in pending:
+                    f.cancel()
+
+    def _sliceable(self, url: str) -> bool:
+        path = url[len(self.api):]
+        return path in ("/manga", "/chapter") or path.endswith("/feed")
+
+    def _slice_bounds(self, url: str, params: dict, count: int) -> List[Optional[str]]:
+        first = self._get_page(url, {**params, "order[createdAt]": "asc", "limit": 1, "offset": 0})
+        last = self._get_page(url, {**params, "order[createdAt]": "desc", "limit": 1, "offset": 0})
+        if not first or not first["data"] or not last or not last["data"]:
+            return [None, None]
+        return _split_range(first["data"][0]["attributes"]["createdAt"],
+                            last["data"][0]["attributes"]["createdAt"], count)
+
+    def _get_slice(self, url: str, params: dict, since: str, until: Optional[str]) -> List[dict]:
+        """Gets every result created in [since, until), in creation order.
+        When the slice is larger than the offset window, the walk restarts from the last creation date seen."""
+        data = []
+        seen = set()
+        offset = 0
+        while True:
+            query = {**params, "order[createdAt]": "asc", "limit": 100, "offset": offset}
+            if since:
+                query["createdAtSince"] = since
+            resp = self._get_page(url, query)
+            page = resp["data"] if resp else []
+            for x in page:
+                if until and x["attributes"]["createdAt"][:19] >= until:
+                    return data
+                if x["id"] not in seen:
+                    seen.add(x["id"])
+                    data.append(x)
+            if len(page) < 100:
+                return data
+            offset += len(page)
+            if offset + 100 > self.offset_window:
+                last = page[-1]["attributes"]["createdAt"][:19]
+                if since and last <= since:  # A whole window created within the same second: nothing else to do
+                    _warn_truncated(url, resp, offset)
+                    return data
+                since, offset = last, 0
+
+    def _iter_slices(self, url: str, params: dict, total: int) -> Iterator[dict]:
+        """Gets results past the offset window by splitting the query into creation date ranges, which are fetched
+        in parallel and yielded in creation order. Order parameters are replaced by ascending creation dates."""
+        params = {k: v for k, v in params.items() if not k.startswith("order[")}
+        count = max(self.page_workers, -(-total // self.offset_window)) * 2
+        bounds = self._slice_bounds(url, params, count)
+        ranges = list(zip(bounds, bounds[1:]))
+        seen = set()
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=max(self.page_workers, 1)) as pool:
+            try:
+                for since, until in ranges:
+                    pending.append(pool.submit(self._get_slice, url, params, since, until))
+                    if len(pending) < max(self.page_workers, 1):
+                        continue
+                    data = [x for x in pending.popleft().result() if x["id"] not in seen]
+                    seen.update(x["id"] for x in data)
+                    yield {"data": data}
+                while pending:
+                    data = [x for x in pending.popleft().result() if x["id"] not in seen]
+                    seen.update(x["id"] for x in data)
+                    yield {"data": data}
+            finally:
+                for f in pending:
+                    f.cancel()
+
+    def _get_page(self, url: str, params: dict) -> Optional[dict]:
+        req = self._request("GET", url, params=params)
+        if req.status_code == 200:
+            return loads(req.content)
+        elif req.status_code == 204:
+            return None
+        else:
+            raise APIError(req)
+
+
+RELATIONSHIP_FIELDS = {
+    Manga: (("author", Author), ("artist", Author), ("cover", Cover)),
+    Chapter: (("parent_manga", Manga), ("group", Group), ("uploader", User)),
+    Group: (("leader", User), ("members", User))
+}
+
+
+def _token_expiry(token: str) -> float:
+    """Gets the expiry timestamp of a session token from its JWT payload, or assumes the default lifetime."""
+    try:
+        payload = token.split(".")[1]
+        return float(json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))["exp"])
+    except (IndexError, ValueError, KeyError, TypeError):
+        return time.time() + SESSION_LIFETIME
+
+
+def _cover_url(cover: Cover, size: int = None) -> str:
+    urls = {None: cover.url, 512: cover.url_512, 256: cover.url_256}
+    if size not in urls:
+        raise ValueError(f"Covers are only available in 512 and 256 pixels wide thumbnails, not {size}.")
+    return urls[size]
+
+
+def _warn_truncated(url: str, resp: dict, offset: int):
+    """Logs a slice walk stopped by more results sharing one creation second than the offset window holds."""
+    logger.warning(f"{url}: more than {offset} results were created within the same second, "
+                   f"up to {resp.get('total', 0) - offset} of them were dropped.")
+
+
+def _split_range(first: str, last: str, count: int) -> List[Optional[str]]:
+    """Splits a range of creation dates into slice bounds, formatted for createdAtSince.
+    The first slice is open at the start, and the last one at the end."""
+    start = datetime.strptime(first[:19], "%Y-%m-%dT%H:%M:%S")
+    step = (datetime.strptime(last[:19], "%Y-%m-%dT%H:%M:%S") - start) / count
+    bounds = [(start + step * x).strftime("%Y-%m-%dT%H:%M:%S") for x in range(1, count)]
+    return [None] + sorted(set(bounds)) + [None]
+
+
+def _relationship_ids(objs) -> Dict[type, set]:
+    wanted = {}
+    for o in objs:
+        for field, cls in RELATIONSHIP_FIELDS.get(type(o), ()):
+            value = getattr(o, field)
+            wanted.setdefault(cls, set()).update(x for x in (value if isinstance(value, list) else [value])
+                                                 if isinstance(x, str))
+    return wanted
+
+
+def _fill_relationships(objs, fetched: dict):
+    for o in objs:
+        for field, _ in RELATIONSHIP_FIELDS.get(type(o), ()):
+            value = getattr(o, field)
+            if isinstance(value, list):
+                setattr(o, field, [fetched.get(x, x) if isinstance(x, str) else x for x in value])
+            elif isinstance(value, str):
+                setattr(o, field, fetched.get(value, value))
 
 
 Client = MangaDex
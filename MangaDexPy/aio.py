@@ -0,0 +1,669 @@
+import asyncio
+import json
+import time
+from collections import deque
+from datetime import timedelta
+from typing import List, Dict, Union, Type, AsyncIterator, Optional
+from . import MangaDex, APIError, NoContentError, LoginError, NotLoggedInError, NoResultsError, INCLUDE_ALL, \
+    _relationship_ids, _fill_relationships, _split_range, _cover_url, _token_expiry, _warn_truncated
+from .manga import Manga
+from .chapter import Chapter
+from .group import Group
+from .user import User
+from .author import Author
+from .cover import Cover
+from .network import NetworkChapter
+from .search import SearchMapping
+from .entity import resolve
+from .decoding import loads
+from .singleflight import AsyncSingleFlight
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncResponse:
+    """Represents a fully read aiohttp response, exposing the parts of the requests API the client relies on."""
+    __slots__ = ("url", "status_code", "headers", "content", "elapsed")
+
+    def __init__(self, url, status_code, headers, content, elapsed):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.elapsed = elapsed
+
+    def json(self):
+        return loads(self.content)
+
+
+class AsyncNetworkReporter:
+    """Sends MD@H reports from a background task, so downloads never wait on them.
+    Queued reports are sent in batches; reports that keep failing, or that overflow the queue, are dropped."""
+    def __init__(self, client, max_pending: int = 1000, batch_size: int = 50, retries: int = 1,
+                 retry_delay: float = 1):
+        self.client = client
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.sent = 0
+        self.dropped = 0
+        self.queue = None
+        self.task = None
+
+    def submit(self, url, success, cache_header, req_bytes, req_duration) -> bool:
+        """Queues a report without blocking. Must be called from the event loop running the client."""
+        if self.task is None or self.task.done():
+            self.queue = self.queue or asyncio.Queue(self.max_pending)
+            self.task = asyncio.ensure_future(self._run())
+        try:
+            self.queue.put_nowait((url, success, cache_header, req_bytes, req_duration))
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            for report in batch:
+                await self._send(report)
+                self.queue.task_done()
+
+    async def _send(self, report):
+        for attempt in range(self.retries + 1):
+            try:
+                await self.client.network_report(*report)
+                self.sent += 1
+                return
+            except Exception:  # Reports are best effort: the reporter task must survive any failure
+                if attempt < self.retries:
+                    await asyncio.sleep(self.retry_delay)
+        self.dropped += 1
+
+    async def flush(self, timeout: float = None) -> bool:
+        """Waits until every queued report was sent or dropped. Returns False if the timeout expired first."""
+        if self.queue is None:
+            return True
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self, timeout: float = 5):
+        await self.flush(timeout)
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+
+class AsyncMangaDex(MangaDex):
+    """Represents the MangaDex API Client, using asyncio and aiohttp."""
+    def __init__(self, connections: int = 100, connections_per_host: int = 10, keepalive_timeout: float = 30):
+        if aiohttp is None:
+            raise ImportError("AsyncMangaDex requires aiohttp. Install it with 'pip install MangaDex.py[async]'.")
+        self.session = None
+        self.configure_transport(connections, connections_per_host, keepalive_timeout)
+        super().__init__()
+
+    def _init_transport(self):
+        self.session = None
+        self.headers = {"Authorization": ""}
+        self.auth_lock = None
+        self.flights = AsyncSingleFlight()
+        self.reporter = AsyncNetworkReporter(self)
+
+    def configure_transport(self, connections: int = 100, connections_per_host: int = 10,
+                            keepalive_timeout: float = 30):
+        """Sets up the aiohttp connection pool: up to `connections` connections, `connections_per_host` per host,
+        kept alive for keepalive_timeout seconds (0 closes them after each request).
+        The pool is created with the session, so this must be called before the first request or after close()."""
+        if self.session is not None and not self.session.closed:
+            raise RuntimeError("The connection pool is already in use: call close() before configure_transport().")
+        self.connections = connections
+        self.connections_per_host = connections_per_host
+        self.keepalive_timeout = keepalive_timeout
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        """Sends pending MD@H reports and closes the underlying HTTP session."""
+        await self.reporter.close()
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        if self.session is None or self.session.closed:
+            if self.keepalive_timeout:
+                connector = aiohttp.TCPConnector(limit=self.connections, limit_per_host=self.connections_per_host,
+                                                 keepalive_timeout=self.keepalive_timeout)
+            else:
+                connector = aiohttp.TCPConnector(limit=self.connections, limit_per_host=self.connections_per_host,
+                                                 force_close=True)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def _renew_session(self, stale: str):
+        """Refreshes the session token, unless another task already replaced the stale one while this one waited."""
+        if self.auth_lock is None:
+            self.auth_lock = asyncio.Lock()
+        async with self.auth_lock:
+            if self.session_token == stale:
+                await self.refresh_session()
+
+    async def _open(self, method: str, url: str, params: dict = None, **kwargs) -> "aiohttp.ClientResponse":
+        """Sends a request through the rate limiter and returns the unread response. The caller must release it.
+        The session token is refreshed when it is about to expire, or once if the API rejects it."""
+        session = self._get_session()
+        route = self._route(url)
+        extra = kwargs.pop("headers", {})
+        auth = self._authenticated(url)
+        if auth and time.time() > self.session_expires - self.refresh_margin:
+            await self._renew_session(self.session_token)
+        attempt = 0
+        renewed = False
+        while True:
+            token = self.session_token
+            headers = {**self.headers, **extra}
+            delay = self.limiter.reserve(route)
+            if delay > 0:
+                self.hooks.emit("rate_limit_wait", url=url, route=route, duration=delay)
+                await asyncio.sleep(delay)
+            self.hooks.emit("request_start", method=method, url=url, route=route, attempt=attempt)
+            start = time.monotonic()
+            r = await session.request(method, url, params=_encode_params(params), headers=headers, **kwargs)
+            self.hooks.emit("request_end", method=method, url=url, route=route, status=r.status,
+                            duration=time.monotonic() - start)
+            self.limiter.update(route, r.status, r.headers)
+            if r.status == 401 and auth and not renewed:
+                renewed = True
+                await self._renew_session(token)
+            elif r.status != 429 or attempt >= self.max_retries:
+                return r
+            r.release()
+            attempt += 1
+            self.hooks.emit("retry", method=method, url=url, route=route, attempt=attempt, status=r.status)
+
+    async def _request(self, method: str, url: str, **kwargs) -> AsyncResponse:
+        """Sends a request. Concurrent identical GET requests share a single response."""
+        key = self._flight_key(method, url, kwargs)
+        if key is None:
+            return await self._cached_request(method, url, **kwargs)
+        return await self.flights.do(key, lambda: self._cached_request(method, url, **kwargs),
+                                     lambda: self.hooks.emit("coalesced", url=url, route=self._route(url)))
+
+    async def _cached_request(self, method: str, url: str, **kwargs) -> AsyncResponse:
+        """Sends a request, serving it from the response cache when possible."""
+        ttl = self._cache_ttl(method, url, kwargs)
+        if not ttl:
+            return await self._send(method, url, **kwargs)
+        key = self.cache.key(url, kwargs.get("params"))
+        entry = self.cache.get(key)
+        if entry is not None and entry.fresh:
+            self.hooks.emit("cache_hit", url=url, route="api", revalidated=False)
+            return AsyncResponse(entry.url, entry.status, entry.headers, entry.content, timedelta(0))
+        if entry is not None:
+            kwargs["headers"] = {**kwargs.get("headers", {}), **entry.validators()}
+        req = await self._send(method, url, **kwargs)
+        if req.status_code == 304 and entry is not None:
+            self.cache.revalidate(key, ttl)
+            self.hooks.emit("cache_hit", url=url, route="api", revalidated=True)
+            return AsyncResponse(entry.url, entry.status, entry.headers, entry.content, timedelta(0))
+        if req.status_code == 200:
+            self.cache.store(key, url, req.status_code, req.headers, req.content, ttl)
+        return req
+
+    async def _send(self, method: str, url: str, **kwargs) -> AsyncResponse:
+        """Sends a request through the rate limiter, retrying when it gets rate limited."""
+        start = time.monotonic()
+        r = await self._open(method, url, **kwargs)
+        try:
+            content = await r.read()
+        finally:
+            r.release()
+        self.hooks.emit("bytes", url=url, route=self._route(url), bytes=len(content))
+        return AsyncResponse(url, r.status, r.headers, content, timedelta(seconds=time.monotonic() - start))
+
+    async def login(self, username: str, password: str) -> bool:
+        """Logs in to MangaDex using an username and a password."""
+        credentials = {"username": username, "password": password}
+        post = await self._request("POST", f"{self.api}/auth/login", data=json.dumps(credentials),
+                                   headers={"Content-Type": "application/json"})
+        return self._store_token(post)
+
+    async def login_token(self, token: str) -> bool:
+        """Logs in to MangaDex using a refresh token."""
+        credentials = {"token": token}
+        post = await self._request("POST", f"{self.api}/auth/refresh", data=json.dumps(credentials),
+                                   headers={"Content-Type": "application/json"})
+        return self._store_token(post)
+
+    async def logout(self):
+        """Resets the current session. Transport settings, hooks, caches and rate limits are kept."""
+        self._forget_tokens()
+
+    def _forget_tokens(self):
+        self.login_success = False
+        self.session_token = None
+        self.refresh_token = None
+        self.session_expires = 0.0
+        self.headers["Authorization"] = ""
+
+    async def refresh_session(self, token: str = None) -> bool:
+        """Refreshes the session using the refresh token."""
+        if not self.login_success:
+            raise NotLoggedInError
+        token = token or self.refresh_token
+        data = {"token": token}
+        post = await self._request("POST", f"{self.api}/auth/refresh", data=json.dumps(data),
+                                   headers={"Content-Type": "application/json"})
+        return self._store_token(post)
+
+    async def check_session(self) -> bool:
+        """Checks if the stored Authorization token is still valid."""
+        req = await self._request("GET", f"{self.api}/auth/check")
+        if req.status_code == 200:
+            resp = req.json()
+            return resp["isAuthenticated"]
+        else:
+            raise APIError(req)
+
+    def _store_token(self, post):
+        if post.status_code == 401:
+            raise LoginError(post)
+        elif not post.status_code == 200:
+            raise APIError(post)
+        else:
+            resp = post.json()
+            self.login_success = True
+            self.session_token = resp["token"]["session"]
+            self.refresh_token = resp["token"]["refresh"]
+            self.session_expires = _token_expiry(self.session_token)
+            self.headers["Authorization"] = resp["token"]["session"]
+            return True
+
+    async def _get_one(self, url: str, obj: Type[Union[Manga, Chapter, Group, Author, Cover, User]],
+                       params: dict = None) -> Union[Manga, Chapter, Group, Author, Cover, User]:
+        req = await self._request("GET", url, params=params)
+        if req.status_code == 200:
+            resp = req.json()
+            return resolve(obj, resp["data"], self)
+        elif req.status_code == 404:
+            raise NoContentError(req)
+        else:
+            raise APIError(req)
+
+    async def get_manga(self, uuid: str, includes: list = None) -> Manga:
+        """Gets a manga with a specific uuid."""
+        includes = INCLUDE_ALL if not includes else includes
+        return await self._get_one(f"{self.api}/manga/{uuid}", Manga, {"includes[]": includes})
+
+    async def get_chapter(self, uuid: str, includes: list = None) -> Chapter:
+        """Gets a chapter with a specific uuid."""
+        includes = INCLUDE_ALL if not includes else includes
+        return await self._get_one(f"{self.api}/chapter/{uuid}", Chapter, {"includes[]": includes})
+
+    async def get_chapters(self, ids: List[str], includes: list = None) -> List[Chapter]:
+        """Gets chapters with specific uuids."""
+        includes = INCLUDE_ALL if not includes else includes
+        return await self._retrieve_ids(f"{self.api}/chapter", Chapter, ids, {"includes[]": includes})
+
+    async def get_mangas(self, ids: List[str], includes: list = None) -> List[Manga]:
+        """Gets mangas with specific uuids."""
+        includes = INCLUDE_ALL if not includes else includes
+        return await self._retrieve_ids(f"{self.api}/manga", Manga, ids, {"includes[]": includes})
+
+    async def get_groups(self, ids: List[str], includes: list = None) -> List[Group]:
+        """Gets groups with specific uuids."""
+        includes = INCLUDE_ALL if not includes else includes
+        return await self._retrieve_ids(f"{self.api}/group", Group, ids, {"includes[]": includes})
+
+    async def get_authors(self, ids: List[str]) -> List[Author]:
+        """Gets authors with specific uuids."""
+        return await self._retrieve_ids(f"{self.api}/author", Author, ids)
+
+    async def get_covers(self, ids: List[str]) -> List[Cover]:
+        """Gets covers with specific uuids."""
+        return await self._retrieve_ids(f"{self.api}/cover", Cover, ids)
+
+    async def get_users(self, ids: List[str]) -> List[User]:
+        """Gets users with specific uuids."""
+        if not self.login_success:
+            raise NotLoggedInError
+        return await self._retrieve_ids(f"{self.api}/user", User, ids)
+
+    async def hydrate(self, objs: List[Union[Manga, Chapter, Group]]) -> List[Union[Manga, Chapter, Group]]:
+        """Replaces relationship ids (left when includes were not requested) with objects fetched in bulk."""
+        wanted = _relationship_ids(objs)
+        getters = {Manga: self.get_mangas, Group: self.get_groups, Author: self.get_authors, Cover: self.get_covers,
+                   User: self.get_users}
+        fetched = {}
+        for cls, ids in wanted.items():
+            if not ids or (cls is User and not self.login_success):
+                continue
+            try:
+                fetched.update({x.id: x for x in await getters[cls](list(ids))})
+            except NoResultsError:
+                pass
+        _fill_relationships(objs, fetched)
+        return objs
+
+    async def get_manga_chapters(self, mg: Manga, params: dict = None, includes: list = None) -> List[Chapter]:
+        """Gets chapters associated with a specific Manga."""
+        includes = INCLUDE_ALL if not includes else includes
+        params = params or {}
+        if includes:
+            params["includes[]"] = includes
+        return await self._retrieve_pages(f"{self.api}/manga/{mg.id}/feed", Chapter, call_limit=100, params=params)
+
+    def iter_manga_chapters(self, mg: Manga, params: dict = None, includes: list = None) -> AsyncIterator[Chapter]:
+        """Iterates over chapters associated with a specific Manga, one page at a time."""
+        includes = INCLUDE_ALL if not includes else includes
+        params = params or {}
+        if includes:
+            params["includes[]"] = includes
+        return self._iter_pages(f"{self.api}/manga/{mg.id}/feed", Chapter, call_limit=100, params=params)
+
+    async def get_manga_covers(self, mg: Manga, params: dict = None) -> List[Cover]:
+        """Gets covers associated with a specific Manga."""
+        params = params or {}
+        params["manga[]"] = mg.id
+        return await self._retrieve_pages(f"{self.api}/cover", Cover, call_limit=100, params=params)
+
+    def iter_manga_covers(self, mg: Manga, params: dict = None) -> AsyncIterator[Cover]:
+        """Iterates over covers associated with a specific Manga, one page at a time."""
+        params = params or {}
+        params["manga[]"] = mg.id
+        return self._iter_pages(f"{self.api}/cover", Cover, call_limit=100, params=params)
+
+    async def get_cover(self, uuid: str) -> Cover:
+        """Gets a cover with a specific uuid."""
+        return await self._get_one(f"{self.api}/cover/{uuid}", Cover)
+
+    async def get_cover_image(self, cover: Cover, size: int = None) -> bytes:
+        """Downloads a cover image, in its original size or as a 512 or 256 pixels wide thumbnail."""
+        url = _cover_url(cover, size)
+        if self.image_cache is not None:
+            data = self.image_cache.get(cover.parent_manga, cover.file, size)
+            if data is not None:
+                self.hooks.emit("cache_hit", url=url, route=self._route(url), revalidated=False)
+                return data
+        req = await self._request("GET", url)
+        if req.status_code == 200:
+            if self.image_cache is not None:
+                self.image_cache.store(req.content, cover.parent_manga, cover.file, size)
+            return req.content
+        elif req.status_code == 404:
+            raise NoContentError(req)
+        else:
+            raise APIError(req)
+
+    async def get_cover_images(self, covers: List[Cover], size: int = None,
+                               workers: int = 8) -> List[Optional[bytes]]:
+        """Downloads many cover images concurrently. Images are returned in the same order as the covers,
+        with None for the covers whose image does not exist."""
+        slots = asyncio.Semaphore(workers)
+
+        async def fetch(cover):
+            async with slots:
+                try:
+                    return await self.get_cover_image(cover, size)
+                except NoContentError:
+                    return None
+        return list(await asyncio.gather(*[fetch(x) for x in covers]))
+
+    async def read_chapter(self, ch: Chapter, force_443: bool = False) -> NetworkChapter:
+        """Pulls a chapter from the MD@H Network."""
+        data = {"forcePort443": force_443}
+        req = await self._request("GET", f"{self.api}/at-home/server/{ch.id}", params=data)
+        if req.status_code == 200:
+            resp = req.json()
+            return NetworkChapter(resp, ch, self)
+        else:
+            raise APIError(req)
+
+    async def network_report(self, url: str, success: bool, cache_header: bool, req_bytes: int,
+                             req_duration: int) -> bool:
+        """Reports statistics back to the MD@H Network."""
+        data = {"url": url, "success": success, "cached": cache_header, "bytes": req_bytes, "duration": req_duration}
+        req = await self._request("POST", f"{self.net_api}/report", data=json.dumps(data),
+                                  headers={"Content-Type": "application/json"})
+        if req.status_code == 200:
+            return True
+        else:
+            raise APIError(req)
+
+    async def get_group(self, uuid: str, includes: list = None) -> Group:
+        """Gets a group with a specific uuid."""
+        includes = INCLUDE_ALL if not includes else includes
+        return await self._get_one(f"{self.api}/group/{uuid}", Group, {"includes[]": includes})
+
+    async def get_user(self, uuid: str = "me") -> User:
+        """Gets an user with a specific uuid."""
+        if uuid == "me" and not self.login_success:
+            raise NotLoggedInError
+        return await self._get_one(f"{self.api}/user/{uuid}", User)
+
+    async def get_user_list(self, limit: int = 100) -> List[Manga]:
+        """Gets the currently logged user's manga list."""
+        if not self.login_success:
+            raise NotLoggedInError
+        return await self._retrieve_pages(f"{self.api}/user/follows/manga", Manga, limit=limit, call_limit=100)
+
+    def iter_user_list(self, limit: int = 0) -> AsyncIterator[Manga]:
+        """Iterates over the currently logged user's manga list, one page at a time."""
+        if not self.login_success:
+            raise NotLoggedInError
+        return self._iter_pages(f"{self.api}/user/follows/manga", Manga, limit=limit, call_limit=100)
+
+    async def get_user_updates(self, limit: int = 100, params: dict = None) -> List[Chapter]:
+        """Gets the currently logged user's manga feed."""
+        if not self.login_success:
+            raise NotLoggedInError
+        params = params or {}
+        return await self._retrieve_pages(f"{self.api}/user/follows/manga/feed", Chapter, call_limit=100,
+                                          limit=limit, params=params)
+
+    def iter_user_updates(self, limit: int = 0, params: dict = None) -> AsyncIterator[Chapter]:
+        """Iterates over the currently logged user's manga feed, one page at a time."""
+        if not self.login_success:
+            raise NotLoggedInError
+        params = params or {}
+        return self._iter_pages(f"{self.api}/user/follows/manga/feed", Chapter, call_limit=100,
+                                limit=limit, params=params)
+
+    async def get_author(self, uuid: str) -> Author:
+        """Gets an author with a specific uuid"""
+        return await self._get_one(f"{self.api}/author/{uuid}", Author)
+
+    async def transform_ids(self, obj: str, content: List[int]) -> Dict:
+        """Gets uuids from legacy ids."""
+        data = {"type": obj, "ids": content}
+        post = await self._request("POST", f"{self.api}/legacy/mapping", data=json.dumps(data),
+                                   headers={"Content-Type": "application/json"})
+        if post.status_code == 200:
+            resp = post.json()
+            return {x["data"]["attributes"]["legacyId"]: x["data"]["attributes"]["newId"] for x in resp}
+        else:
+            raise APIError(post)
+
+    async def search(self, obj: str, params: dict,
+                     limit: int = 100) -> List[Union[Manga, Chapter, Group, Author, Cover, User]]:
+        """Searches an object."""
+        m = SearchMapping(obj)
+        return await self._retrieve_pages(f"{self.api}{m.path}", m.object, limit=limit, call_limit=100,
+                                          params=params)
+
+    def iter_search(self, obj: str, params: dict,
+                    limit: int = 0) -> AsyncIterator[Union[Manga, Chapter, Group, Author, Cover, User]]:
+        """Searches an object, yielding results one page at a time."""
+        m = SearchMapping(obj)
+        return self._iter_pages(f"{self.api}{m.path}", m.object, limit=limit, call_limit=100, params=params)
+
+    async def _retrieve_pages(self, url: str, obj: Type[Union[Manga, Chapter, Group, Author, Cover]],
+                              limit: int = 0, call_limit: int = 500,
+                              params: dict = None) -> List[Union[Manga, Chapter, Group, Author, Cover]]:
+        data = [x async for x in self._iter_pages(url, obj, limit=limit, call_limit=call_limit, params=params)]
+        if not data:
+            raise NoResultsError()
+        return data
+
+    async def _retrieve_ids(self, url: str, obj: Type[Union[Manga, Chapter, Group, Author, Cover, User]],
+                            ids: List[str],
+                            params: dict = None) -> List[Union[Manga, Chapter, Group, Author, Cover, User]]:
+        ids = list(dict.fromkeys(ids))
+        data = []
+        for sub in [ids[x:x+100] for x in range(0, len(ids), 100)]:
+            data += [x async for x in self._iter_pages(url, obj, limit=len(sub), call_limit=100,
+                                                       params={**(params or {}), "ids[]": sub})]
+        if not data:
+            raise NoResultsError()
+        return data
+
+    async def _iter_pages(self, url: str, obj: Type[Union[Manga, Chapter, Group, Author, Cover]],
+                          limit: int = 0, call_limit: int = 500,
+                          params: dict = None) -> AsyncIterator[Union[Manga, Chapter, Group, Author, Cover]]:
+        params = params or {}
+        count = 0
+        if "limit" in params:
+            params.pop("limit")
+        if "offset" in params:
+            params.pop("offset")
+        async for resp in self._iter_responses(url, params, limit, call_limit):
+            for x in resp["data"]:
+                yield resolve(obj, x, self)
+                count += 1
+                if limit and count >= limit:
+                    return
+
+    async def _iter_responses(self, url: str, params: dict, limit: int, call_limit: int) -> AsyncIterator[dict]:
+        page_limit = limit if limit <= call_limit and limit != 0 else call_limit
+        resp = await self._get_page(url, {"limit": page_limit, "offset": 0, **params})
+        if resp is None:
+            return
+        end = min(resp["total"], limit) if limit else resp["total"]
+        if end > self.offset_window and self._sliceable(url):
+            async for resp in self._iter_slices(url, params, end):
+                yield resp
+            return
+        yield resp
+        offsets = range(call_limit, end, call_limit)
+        if self.page_workers <= 1:
+            for offset in offsets:
+                resp = await self._get_page(url, {"limit": page_limit, "offset": offset, **params})
+                if resp is None:
+                    return
+                yield resp
+            return
+        # Same windowed prefetch as the threaded client, using tasks instead of a pool.
+        pending = deque()
+        try:
+            for offset in offsets:
+                if len(pending) >= self.page_workers:
+                    resp = await pending.popleft()
+                    if resp is None:
+                        return
+                    yield resp
+                pending.append(asyncio.ensure_future(
+                    self._get_page(url, {"limit": page_limit, "offset": offset, **params})))
+            while pending:
+                resp = await pending.popleft()
+                if resp is None:
+                    return
+                yield resp
+        finally:
+            for f in pending:
+                f.cancel()
+
+    async def _slice_bounds(self, url: str, params: dict, count: int) -> List[Optional[str]]:
+        first, last = await asyncio.gather(
+            self._get_page(url, {**params, "order[createdAt]": "asc", "limit": 1, "offset": 0}),
+            self._get_page(url, {**params, "order[createdAt]": "desc", "limit": 1, "offset": 0}))
+        if not first or not first["data"] or not last or not last["data"]:
+            return [None, None]
+        return _split_range(first["data"][0]["attributes"]["createdAt"],
+                            last["data"][0]["attributes"]["createdAt"], count)
+
+    async def _get_slice(self, url: str, params: dict, since: str, until: Optional[str]) -> List[dict]:
+        """Gets every result created in [since, until), in creation order."""
+        data = []
+        seen = set()
+        offset = 0
+        while True:
+            query = {**params, "order[createdAt]": "asc", "limit": 100, "offset": offset}
+            if since:
+                query["createdAtSince"] = since
+            resp = await self._get_page(url, query)
+            page = resp["data"] if resp else []
+            for x in page:
+                if until and x["attributes"]["createdAt"][:19] >= until:
+                    return data
+                if x["id"] not in seen:
+                    seen.add(x["id"])
+                    data.append(x)
+            if len(page) < 100:
+                return data
+            offset += len(page)
+            if offset + 100 > self.offset_window:
+                last = page[-1]["attributes"]["createdAt"][:19]
+                if since and last <= since:
+                    _warn_truncated(url, resp, offset)
+                    return data
+                since, offset = last, 0
+
+    async def _iter_slices(self, url: str, params: dict, total: int) -> AsyncIterator[dict]:
+        """Gets results past the offset window by splitting the query into creation date ranges."""
+        params = {k: v for k, v in params.items() if not k.startswith("order[")}
+        count = max(self.page_workers, -(-total // self.offset_window)) * 2
+        bounds = await self._slice_bounds(url, params, count)
+        seen = set()
+        pending = deque()
+        try:
+            for since, until in zip(bounds, bounds[1:]):
+                pending.append(asyncio.ensure_future(self._get_slice(url, params, since, until)))
+                if len(pending) < max(self.page_workers, 1):
+                    continue
+                data = [x for x in await pending.popleft() if x["id"] not in seen]
+                seen.update(x["id"] for x in data)
+                yield {"data": data}
+            while pending:
+                data = [x for x in await pending.popleft() if x["id"] not in seen]
+                seen.update(x["id"] for x in data)
+                yield {"data": data}
+        finally:
+            for f in pending:
+                f.cancel()
+
+    async def _get_page(self, url: str, params: dict) -> Optional[dict]:
+        req = await self._request("GET", url, params=params)
+        if req.status_code == 200:
+            return req.json()
+        elif req.status_code == 204:
+            return None
+        else:
+            raise APIError(req)
+
+
+def _encode_params(params: Optional[dict]) -> Optional[list]:
+    """Flattens requests-style parameters (lists, booleans, None) into what aiohttp accepts."""
+    if params is None:
+        return None
+    flat = []
+    for k, v in params.items():
+        for x in (v if isinstance(v, (list, tuple)) else [v]):
+            if x is None:
+                continue
+            if isinstance(x, bool):
+                x = "true" if x else "false"
+            flat.append((k, str(x)))
+    return flat
@@ -0,0 +1,116 @@
+import asyncio
+import os
+import time
+import logging
+from pathlib import Path
+from MangaDexPy import Chapter, Manga, APIError
+from MangaDexPy.downloader import page_name_to_integer, CHUNK_SIZE
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+logger = logging.getLogger(__name__)
+
+# asyncio counterpart of downloader.py, to be used with MangaDexPy.aio.AsyncMangaDex.
+# Like the threaded downloader, it is provided 'as-is', as an example for library usage.
+
+
+async def dl_page(net, page, pages_total, path):
+    """Helper for dl_chapter to download pages with. Pages are streamed to a temporary file, then renamed."""
+    name = page_name_to_integer(page.rsplit("/", 1)[1], pages_total)
+    target = str(Path(path + "/" + name))
+    tmp = target + ".part"
+    start = time.monotonic()
+    try:
+        p = await net.client._open("GET", page)
+        try:
+            p.raise_for_status()
+            length = 0
+            with open(tmp, "wb") as f:
+                async for chunk in p.content.iter_chunked(CHUNK_SIZE):
+                    f.write(chunk)
+                    length += len(chunk)
+            os.replace(tmp, target)
+            cached = True if p.headers.get("x-cache") == "HIT" else False
+        finally:
+            p.release()
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        net.report(page, False, False, 0, int((time.monotonic() - start) * 1000))
+        logger.warning(f"Request for {page} failed. This was reported to the MD backend.")
+        return False
+    elapsed = int((time.monotonic() - start) * 1000)
+    net.report(page, True, cached, length, elapsed)
+    net.client.hooks.emit("bytes", url=page, route=net.client._route(page), bytes=length)
+    logger.debug(f"Downloaded {page} in {elapsed} ms ({length} bytes). "
+                 f"Was cached on server: {cached}.")
+    return True
+
+
+async def dl_chapter(chapter: Chapter, path, light: bool = False, workers: int = 8):
+    """Downloads an entire chapter, fetching up to `workers` pages at once."""
+    net = await chapter.get_md_network()
+    logger.info(f"Got assigned a MD@H node to download: {net.node_url}. "
+                f"Attempting to download {len(net.pages)} pages.")
+    state = {"net": net}
+    lock = asyncio.Lock()
+    semaphore = asyncio.Semaphore(workers)
+
+    nodes = chapter.client.nodes
+
+    async def _refresh(failed):
+        async with lock:
+            if state["net"] is failed:
+                net = await chapter.get_md_network()
+                if net.node_url == failed.node_url and not nodes.healthy(net.node_url):
+                    net = await chapter.get_md_network(force_443=True)
+                state["net"] = net
+                logger.info(f"Got assigned a new MD@H node to download: {net.node_url}. Resuming downloads...")
+            return state["net"]
+
+    async def _page_target(index):
+        async with semaphore:
+            for attempt in range(nodes.max_attempts):
+                current = state["net"]
+                try:
+                    if current.expires_soon(nodes.refresh_margin) or not nodes.healthy(current.node_url):
+                        current = await _refresh(current)
+                except (APIError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.warning(f"Could not get a MD@H node for chapter {chapter.id}: {e!r}")
+                    await asyncio.sleep(nodes.backoff(attempt))
+                    continue
+                pages = current.pages_redux if light else current.pages
+                start = time.monotonic()
+                resp = await dl_page(current, pages[index], len(pages), path)
+                nodes.record(current.node_url, resp, time.monotonic() - start)
+                if resp:
+                    return
+                await asyncio.sleep(nodes.backoff(attempt))
+            logger.error(f"Giving up on page {index + 1} of chapter {chapter.id} after {nodes.max_attempts} attempts.")
+
+    tasks = [asyncio.ensure_future(_page_target(x)) for x in range(len(net.pages_redux if light else net.pages))]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # Don't leave the other pages downloading in the background once the chapter has failed.
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    logger.info(f"Successfully downloaded and reported status for {len(net.pages)} pages.")
+
+
+async def dl_manga(manga: Manga, base_path, language: str = "en", light: bool = False, workers: int = 8):
+    """Downloads an entire manga."""
+    bp = Path(base_path)
+    chs = await manga.get_chapters()
+    chs = [x for x in chs if x.language == language]
+    for ch in chs:
+        cp = Path(str(bp) + f"/Vol.{ch.volume} Ch.{ch.chapter}")
+        if cp.exists():
+            logger.info(f"Folder for {str(cp)} already exists, skipping chapter.")
+        else:
+            os.mkdir(str(cp))
+            await dl_chapter(ch, str(cp), light, workers)
+    logger.info(f"Successfully processed {len(chs)} chapters.")
@@ -11,3 +11,9 @@ class Author:
         self.created_at = _attrs.get("createdAt")
         self.updated_at = _attrs.get("updatedAt")
         self.client = client
+
+    def to_dict(self) -> dict:
+        """Rebuilds the API object of this author."""
+        return {"id": self.id, "type": "author", "attributes": {
+            "name": self.name, "imageUrl": self.image, "biography": self.bio,
+            "createdAt": self.created_at, "updatedAt": self.updated_at}, "relationships": []}
@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from datetime import timedelta
+from urllib.parse import urlencode
+from typing import Dict, Optional
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Time-to-live (in seconds) of cached responses, by API path prefix. The longest matching prefix wins.
+# A TTL of 0 disables caching, which is used for authenticated or per-user endpoints.
+DEFAULT_TTLS = {
+    "/manga": 600,
+    "/chapter": 600,
+    "/cover": 3600,
+    "/author": 3600,
+    "/group": 3600,
+    "/manga/tag": 86400,
+    "/legacy": 86400,
+    "/user": 0,
+    "/auth": 0,
+    "/at-home": 0
+}
+
+
+class CacheEntry:
+    """Represents a response stored in the cache."""
+    __slots__ = ("url", "status", "headers", "content", "expires")
+
+    def __init__(self, url, status, headers, content, expires):
+        self.url = url
+        self.status = status
+        self.headers = CaseInsensitiveDict(json.loads(headers))
+        self.content = content
+        self.expires = expires
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires > time.time()
+
+    def validators(self) -> Dict[str, str]:
+        """Gets the headers used to revalidate this entry with a conditional request."""
+        headers = {}
+        if "ETag" in self.headers:
+            headers["If-None-Match"] = self.headers["ETag"]
+        if "Last-Modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["Last-Modified"]
+        return headers
+
+    def to_response(self) -> requests.Response:
+        r = requests.Response()
+        r.url = self.url
+        r.status_code = self.status
+        r.reason = "OK"
+        r.headers = CaseInsensitiveDict(self.headers)
+        r._content = self.content
+        r.elapsed = timedelta(0)
+        return r
+
+
+class ResponseCache:
+    """Represents an on-disk, size-bounded cache of API responses, evicted by least recent use."""
+    def __init__(self, path: str, max_size: int = 256 * 1024 * 1024, ttl: int = 300, ttls: Dict[str, int] = None):
+        self.path = path
+        self.max_size = max_size
+        self.default_ttl = ttl
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self.lock, self.db:
+            self.db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, url TEXT, status INTEGER, "
+                            "headers TEXT, content BLOB, size INTEGER, expires REAL, accessed REAL)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def ttl(self, path: str) -> int:
+        """Gets the time-to-live of responses for an API path."""
+        prefix = max((x for x in self.ttls if path.startswith(x)), key=len, default=None)
+        return self.ttls[prefix] if prefix is not None else self.default_ttl
+
+    @staticmethod
+    def key(url: str, params: dict = None) -> str:
+        """Builds a cache key from an URL and normalized query parameters."""
+        flat = []
+        for k, v in (params or {}).items():
+            for x in (v if isinstance(v, (list, tuple)) else [v]):
+                if x is not None:
+                    flat.append((k, str(x)))
+        return f"{url}?{urlencode(sorted(flat))}"
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Gets a cached response, fresh or not."""
+        with self.lock, self.db:
+            row = self.db.execute("SELECT url, status, headers, content, expires FROM responses WHERE key = ?",
+                                  (key,)).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        return CacheEntry(*row)
+
+    def store(self, key: str, url: str, status: int, headers, content: bytes, ttl: int):
+        now = time.time()
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            (key, url, status, json.dumps(dict(headers)), content, len(content), now + ttl, now))
+            self._evict()
+
+    def revalidate(self, key: str, ttl: int):
+        """Extends the lifetime of a response the server reported as not modified."""
+        now = time.time()
+        with self.lock, self.db:
+            self.db.execute("UPDATE responses SET expires = ?, accessed = ? WHERE key = ?", (now + ttl, now, key))
+
+    def _evict(self):
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_size:
+            return
+        for key, size in self.db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+            self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_size:
+                break
+
+    def clear(self):
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM responses")
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class ImageCache:
+    """Represents an on-disk, size-bounded cache of images, evicted by least recent use.
+    Files are named after a hash of their key, so the cache can be shared by processes serving the same images."""
+    def __init__(self, path: str, max_size: int = 1024 * 1024 * 1024):
+        self.path = path
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.files = {}
+        self.size = 0
+        os.makedirs(path, exist_ok=True)
+        for root, _, files in os.walk(path):
+            for name in files:
+                if not name.endswith(".part"):
+                    stat = os.stat(os.path.join(root, name))
+                    self.files[os.path.join(root, name)] = (stat.st_size, stat.st_mtime)
+                    self.size += stat.st_size
+
+    def file(self, *key) -> str:
+        """Gets the path a key is stored at."""
+        digest = hashlib.sha256("/".join(str(x) for x in key).encode()).hexdigest()
+        return os.path.join(self.path, digest[:2], digest)
+
+    def get(self, *key) -> Optional[bytes]:
+        file = self.file(*key)
+        try:
+            with open(file, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        now = time.time()
+        try:
+            os.utime(file, (now, now))
+        except OSError:  # Evicted by another process since it was read
+            return data
+        with self.lock:
+            # Files can be stored by other processes sharing the cache, so they may be new to this one.
+            old = self.files.get(file)
+            self.size += len(data) - (old[0] if old else 0)
+            self.files[file] = (len(data), now)
+            self._evict()
+        return data
+
+    def store(self, data: bytes, *key) -> str:
+        file = self.file(*key)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        tmp = f"{file}.{os.getpid()}.{threading.get_ident()}.part"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, file)
+        with self.lock:
+            old = self.files.get(file)
+            self.size += len(data) - (old[0] if old else 0)
+            self.files[file] = (len(data), time.time())
+            self._evict()
+        return file
+
+    def _evict(self):
+        if self.size <= self.max_size:
+            return
+        for file, (size, _) in sorted(self.files.items(), key=lambda x: x[1][1]):
+            try:
+                os.remove(file)
+            except OSError:
+                pass
+            del self.files[file]
+            self.size -= size
+            if self.size <= self.max_size:
+                break
+
+    def clear(self):
+        with self.lock:
+            for file in self.files:
+                try:
+                    os.remove(file)
+                except OSError:
+                    pass
+            self.files.clear()
+            self.size = 0
@@ -0,0 +1,244 @@
+import re
+import json
+import sqlite3
+import threading
+from typing import List, Union, Iterable, Optional
+from . import NoResultsError
+from .manga import Manga
+from .chapter import Chapter
+from .group import Group
+from .author import Author
+from .cover import Cover
+from .search import SearchMapping
+from .entity import resolve
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS objects (type TEXT, id TEXT, data TEXT, created_at TEXT, updated_at TEXT, "
+    "PRIMARY KEY (type, id))",
+    "CREATE TABLE IF NOT EXISTS manga (id TEXT PRIMARY KEY, language TEXT, status TEXT, content TEXT, "
+    "demographic TEXT, year INTEGER)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS manga_titles USING fts5(titles)",
+    "CREATE TABLE IF NOT EXISTS manga_tags (id TEXT, tag TEXT)",
+    "CREATE TABLE IF NOT EXISTS chapter (id TEXT PRIMARY KEY, manga TEXT, language TEXT, volume TEXT, "
+    "chapter TEXT, volume_num REAL, chapter_num REAL)",
+    "CREATE TABLE IF NOT EXISTS chapter_groups (id TEXT, grp TEXT)",
+    "CREATE TABLE IF NOT EXISTS names (type TEXT, id TEXT, name TEXT, PRIMARY KEY (type, id))",
+    "CREATE TABLE IF NOT EXISTS cover (id TEXT PRIMARY KEY, manga TEXT, volume TEXT)",
+    "CREATE INDEX IF NOT EXISTS manga_tags_tag ON manga_tags (tag, id)",
+    "CREATE INDEX IF NOT EXISTS manga_language ON manga (language)",
+    "CREATE INDEX IF NOT EXISTS chapter_manga ON chapter (manga, volume_num, chapter_num)",
+    "CREATE INDEX IF NOT EXISTS chapter_language ON chapter (language)",
+    "CREATE INDEX IF NOT EXISTS chapter_groups_grp ON chapter_groups (grp, id)",
+    "CREATE INDEX IF NOT EXISTS names_name ON names (type, name)",
+    "CREATE INDEX IF NOT EXISTS cover_manga ON cover (manga, volume)"
+)
+TYPES = {Manga: "manga", Chapter: "chapter", Group: "group", Author: "author", Cover: "cover"}
+ORDERS = {
+    "manga": {"createdAt": "o.created_at", "updatedAt": "o.updated_at", "year": "t.year"},
+    "chapter": {"createdAt": "o.created_at", "updatedAt": "o.updated_at", "volume": "t.volume_num",
+                "chapter": "t.chapter_num"},
+    "group": {"createdAt": "o.created_at", "updatedAt": "o.updated_at", "name": "t.name"},
+    "author": {"createdAt": "o.created_at", "updatedAt": "o.updated_at", "name": "t.name"},
+    "cover": {"createdAt": "o.created_at", "updatedAt": "o.updated_at", "volume": "t.volume"}
+}
+IGNORED = ("limit", "offset", "includes[]")
+_WORD = re.compile(r"\w+")
+
+
+class Catalog:
+    """Represents a local, SQLite-backed catalog of Mangas, Chapters, Groups, Authors and Covers.
+    Objects are stored with their own attributes and the ids of their relationships, with indexes on the fields
+    search() filters by.
+    Stored objects are only replaced by newer or different versions of themselves, never by older ones."""
+    def __init__(self, path: str, client=None):
+        self.path = path
+        self.client = client
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self.lock, self.db:
+            for statement in SCHEMA:
+                self.db.execute(statement)
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+
+    def store(self, objs: Iterable[Union[Manga, Chapter, Group, Author, Cover]]) -> int:
+        """Stores objects and indexes them. Returns how many were added or updated."""
+        count = 0
+        with self.lock, self.db:
+            for o in objs:
+                kind = TYPES[type(o)]
+                data = json.dumps(o.to_dict())
+                row = self.db.execute("SELECT updated_at, data FROM objects WHERE type = ? AND id = ?",
+                                      (kind, o.id)).fetchone()
+                if row is not None and ((row[0] or "") > (o.updated_at or "") or row[1] == data):
+                    continue
+                self._remove(kind, o.id)
+                self.db.execute("INSERT INTO objects VALUES (?, ?, ?, ?, ?)",
+                                (kind, o.id, data, o.created_at, o.updated_at))
+                getattr(self, f"_index_{kind}")(o)
+                count += 1
+        return count
+
+    def _index_manga(self, o: Manga):
+        cur = self.db.execute("INSERT INTO manga VALUES (?, ?, ?, ?, ?, ?)",
+                              (o.id, o.language, o.status, o.content, o.type, o.year))
+        # The full-text row of a manga shares its rowid, holding every title on its own line.
+        titles = sorted({x for t in [o.title or {}] + (o.titles or []) for x in t.values() if x})
+        self.db.execute("INSERT INTO manga_titles (rowid, titles) VALUES (?, ?)", (cur.lastrowid, "\n".join(titles)))
+        self.db.executemany("INSERT INTO manga_tags VALUES (?, ?)", [(o.id, x.id) for x in o.tags])
+
+    def _index_chapter(self, o: Chapter):
+        rel = o.to_dict()["relationships"]
+        manga = next((x["id"] for x in rel if x["type"] == "manga"), None)
+        self.db.execute("INSERT INTO chapter VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (o.id, manga, o.language, o.volume, o.chapter, _number(o.volume), _number(o.chapter)))
+        self.db.executemany("INSERT INTO chapter_groups VALUES (?, ?)",
+                            [(o.id, x["id"]) for x in rel if x["type"] == "scanlation_group"])
+
+    def _index_group(self, o: Group):
+        self.db.execute("INSERT INTO names VALUES (?, ?, ?)", ("group", o.id, (o.name or "").lower()))
+
+    def _index_author(self, o: Author):
+        self.db.execute("INSERT INTO names VALUES (?, ?, ?)", ("author", o.id, (o.name or "").lower()))
+
+    def _index_cover(self, o: Cover):
+        self.db.execute("INSERT INTO cover VALUES (?, ?, ?)", (o.id, o.parent_manga, o.volume))
+
+    def _remove(self, kind: str, uuid: str):
+        self.db.execute("DELETE FROM objects WHERE type = ? AND id = ?", (kind, uuid))
+        if kind == "manga":
+            self.db.execute("DELETE FROM manga_titles WHERE rowid IN (SELECT rowid FROM manga WHERE id = ?)", (uuid,))
+        tables = {"manga": ("manga", "manga_tags"), "chapter": ("chapter", "chapter_groups"),
+                  "cover": ("cover",)}
+        for table in tables.get(kind, ()):
+            self.db.execute(f"DELETE FROM {table} WHERE id = ?", (uuid,))
+        if kind in ("group", "author"):
+            self.db.execute("DELETE FROM names WHERE type = ? AND id = ?", (kind, uuid))
+
+    def remove(self, obj: str, uuid: str):
+        with self.lock, self.db:
+            self._remove(SearchMapping(obj).string, uuid)
+
+    def get(self, obj: str, uuid: str) -> Optional[Union[Manga, Chapter, Group, Author, Cover]]:
+        """Gets a stored object with a specific uuid, or None if it is not in the catalog."""
+        m = SearchMapping(obj)
+        with self.lock:
+            row = self.db.execute("SELECT data FROM objects WHERE type = ? AND id = ?", (m.string, uuid)).fetchone()
+        return resolve(m.object, json.loads(row[0]), self.client) if row else None
+
+    def search(self, obj: str, params: dict = None,
+               limit: int = 100) -> List[Union[Manga, Chapter, Group, Author, Cover]]:
+        """Searches stored objects, taking the same parameters as MangaDex.search().
+        Supported filters are ids[], title, includedTags[], excludedTags[] (and their modes), originalLanguage[],
+        status[], contentRating[], publicationDemographic[] and year for mangas; ids[], manga, groups[],
+        translatedLanguage[], volume and chapter for chapters; ids[] and name for groups and authors;
+        ids[], manga[] and volume for covers. Results can be sorted with order[field].
+        Manga titles are matched word by word: each word of the title filter must start a word of the titles."""
+        m = SearchMapping(obj)
+        if m.object not in TYPES:
+            raise ValueError(f"Objects of type {m.string} are not stored in the catalog.")
+        params = params or {}
+        table = "names" if m.string in ("group", "author") else m.string
+        where, args = ["o.type = ?"], [m.string]
+        for k, v in params.items():
+            if k in IGNORED or k.startswith("order[") or k.endswith("TagsMode"):
+                continue
+            clause = _filter(m.string, k, v if isinstance(v, (list, tuple)) else [v], params)
+            if clause is None:
+                raise ValueError(f"Unsupported catalog filter for {m.string}: {k}")
+            where.append(clause[0])
+            args += clause[1]
+        orders = []
+        for k, v in params.items():
+            if k.startswith("order["):
+                column = ORDERS[m.string].get(k[6:-1])
+                if column is None:
+                    raise ValueError(f"Unsupported catalog order for {m.string}: {k}")
+                orders.append(f"{column} {'DESC' if v == 'desc' else 'ASC'}")
+        query = f"SELECT o.data FROM objects o JOIN {table} t ON t.id = o.id" + \
+            (" AND t.type = o.type" if table == "names" else "") + \
+            f" WHERE {' AND '.join(where)} ORDER BY {', '.join(orders + ['o.rowid'])}"
+        if limit:
+            query += f" LIMIT {int(limit)} OFFSET {int(params.get('offset', 0))}"
+        with self.lock:
+            rows = self.db.execute(query, args).fetchall()
+        if not rows:
+            raise NoResultsError()
+        return [resolve(m.object, json.loads(x[0]), self.client) for x in rows]
+
+    def refresh(self, obj: str, params: dict = None, limit: int = 0) -> int:
+        """Fetches objects from the API with the catalog's client and stores them. Returns how many were updated."""
+        count = 0
+        batch = []
+        for x in self.client.iter_search(obj, dict(params or {}), limit=limit):
+            batch.append(x)
+            if len(batch) >= 100:
+                count += self.store(batch)
+                batch = []
+        return count + self.store(batch)
+
+    def clear(self):
+        with self.lock, self.db:
+            for table in ("objects", "manga", "manga_titles", "manga_tags", "chapter", "chapter_groups", "names",
+                          "cover"):
+                self.db.execute(f"DELETE FROM {table}")
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _in(column: str, values: list):
+    return f"{column} IN ({', '.join('?' * len(values))})", list(values)
+
+
+def _filter(kind: str, key: str, values: list, params: dict):
+    if key == "ids[]":
+        return _in("o.id", values)
+    if kind == "manga":
+        columns = {"originalLanguage[]": "t.language", "status[]": "t.status", "contentRating[]": "t.content",
+                   "publicationDemographic[]": "t.demographic", "year": "t.year"}
+        if key in columns:
+            return _in(columns[key], values)
+        if key == "title":
+            # Every word must start a word of the titles, a query the full-text index answers without a scan.
+            words = " ".join('"{}"*'.format(x.replace('"', '""')) for x in _WORD.findall(values[0]))
+            if not words:
+                return "0", []
+            return "t.rowid IN (SELECT rowid FROM manga_titles WHERE manga_titles MATCH ?)", [words]
+        if key in ("includedTags[]", "excludedTags[]"):
+            mode = params.get(key[:-3] + "Mode", "AND" if key == "includedTags[]" else "OR").upper()
+            sub, args = _in("tag", values)
+            if mode == "AND":
+                sub = f"o.id IN (SELECT id FROM manga_tags WHERE {sub} GROUP BY id HAVING COUNT(DISTINCT tag) = ?)"
+                args.append(len(set(values)))
+            else:
+                sub = f"o.id IN (SELECT id FROM manga_tags WHERE {sub})"
+            if key == "excludedTags[]":
+                sub = sub.replace("o.id IN", "o.id NOT IN", 1)
+            return sub, args
+    elif kind == "chapter":
+        columns = {"manga": "t.manga", "translatedLanguage[]": "t.language", "volume": "t.volume",
+                   "volume[]": "t.volume", "chapter": "t.chapter", "chapter[]": "t.chapter"}
+        if key in columns:
+            return _in(columns[key], values)
+        if key == "groups[]":
+            sub, args = _in("grp", values)
+            return f"o.id IN (SELECT id FROM chapter_groups WHERE {sub})", args
+    elif kind in ("group", "author"):
+        if key == "name":
+            return "t.name LIKE ?", [f"%{values[0].lower()}%"]
+    elif kind == "cover":
+        columns = {"manga[]": "t.manga", "manga": "t.manga", "volume": "t.volume", "volume[]": "t.volume"}
+        if key in columns:
+            return _in(columns[key], values)
+    return None
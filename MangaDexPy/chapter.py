@@ -1,12 +1,20 @@
+from .entity import stubs, index_relationships
+from .manga import Manga
+from .group import Group
+from .user import User
+
+RELATIONSHIPS = {"manga": Manga, "scanlation_group": Group, "user": User}
+
+
 class Chapter:
     """Represents a MangaDex Chapter."""
     __slots__ = ("id", "volume", "chapter", "title", "language", "pages_external", "published_at", "created_at",
                  "updated_at", "parent_manga", "group", "uploader", "client")
+    RELATIONSHIP_SLOTS = ("parent_manga", "group", "uploader")
 
     def __init__(self, data, client):
         self.id = data.get("id")
         _attrs = data.get("attributes")
-        _rel = data.get("relationships", [])
         self.volume = _attrs.get("volume")
         self.chapter = _attrs.get("chapter")
         self.title = _attrs.get("title")
@@ -15,25 +23,20 @@ class Chapter:
         self.published_at = _attrs.get("publishAt")
         self.created_at = _attrs.get("createdAt")
         self.updated_at = _attrs.get("updatedAt")
-        try:
-            _manga = [x["attributes"] for x in _rel if x["type"] == "manga"]
-            from .manga import Manga
-            self.parent_manga = next((Manga(x, client) for x in _rel if x["type"] == "manga"), None)
-        except (IndexError, KeyError):
-            self.parent_manga = next((x["id"] for x in _rel if x["type"] == "manga"), None)
-        try:
-            _group = [x["attributes"] for x in _rel if x["type"] == "scanlation_group"]
-            from .group import Group
-            self.group = [Group(x, client) for x in _rel if x["type"] == "scanlation_group"]
-        except (IndexError, KeyError):
-            self.group = [x["id"] for x in _rel if x["type"] == "scanlation_group"]
-        try:
-            _uploader = [x["attributes"] for x in _rel if x["type"] == "user"]
-            from .user import User
-            self.uploader = next((User(x, client) for x in _rel if x["type"] == "user"), None)
-        except (IndexError, KeyError):
-            self.uploader = next((x["id"] for x in _rel if x["type"] == "user"), None)
         self.client = client
+        _rel = index_relationships(data.get("relationships", []), RELATIONSHIPS, client)
+        self.parent_manga = next(iter(_rel.get("manga", [])), None)
+        self.group = _rel.get("scanlation_group", [])
+        self.uploader = next(iter(_rel.get("user", [])), None)
+
+    def to_dict(self) -> dict:
+        """Rebuilds the API object of this chapter, with stubs for its relationships."""
+        return {"id": self.id, "type": "chapter", "attributes": {
+            "volume": self.volume, "chapter": self.chapter, "title": self.title,
+            "translatedLanguage": self.language, "externalUrl": self.pages_external, "publishAt": self.published_at,
+            "createdAt": self.created_at, "updatedAt": self.updated_at},
+            "relationships": stubs("manga", [self.parent_manga]) + stubs("scanlation_group", self.group) +
+            stubs("user", [self.uploader])}
 
     def get_md_network(self, force_443: bool = False):
         return self.client.read_chapter(self, force_443)
@@ -1,7 +1,11 @@
+from .entity import stubs
+
+
 class Cover:
     """Represents a MangaDex Cover."""
     __slots__ = ("id", "desc", "volume", "file", "parent_manga", "url", "url_512", "url_256", "created_at",
                  "updated_at", "client")
+    RELATIONSHIP_SLOTS = ("parent_manga", "url", "url_512", "url_256")
 
     def __init__(self, data, client):
         self.id = data.get("id")
@@ -17,3 +21,13 @@ class Cover:
         self.created_at = _attrs.get("createdAt")
         self.updated_at = _attrs.get("updatedAt")
         self.client = client
+
+    def to_dict(self) -> dict:
+        """Rebuilds the API object of this cover, with a stub for its manga."""
+        return {"id": self.id, "type": "cover_art", "attributes": {
+            "description": self.desc, "volume": self.volume, "fileName": self.file,
+            "createdAt": self.created_at, "updatedAt": self.updated_at},
+            "relationships": stubs("manga", [self.parent_manga])}
+
+    def get_image(self, size: int = None) -> bytes:
+        return self.client.get_cover_image(self, size)
@@ -0,0 +1,42 @@
+import json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# Responses are decoded with the fastest JSON library available, falling back to the standard library.
+# Every backend produces the same plain dicts and lists, which is what the models are built from.
+BACKENDS = {"json": json.loads}
+if msgspec is not None:
+    _decode = msgspec.json.Decoder().decode
+
+    def _msgspec_loads(content):
+        # Raises the same error as the other backends (orjson's is a subclass of it) on invalid bodies.
+        try:
+            return _decode(content)
+        except msgspec.DecodeError as e:
+            doc = content.decode("utf-8", "replace") if isinstance(content, bytes) else content
+            raise json.JSONDecodeError(str(e), doc, 0) from None
+    BACKENDS["msgspec"] = _msgspec_loads
+if orjson is not None:
+    BACKENDS["orjson"] = orjson.loads
+backend = next(x for x in ("orjson", "msgspec", "json") if x in BACKENDS)
+_loads = BACKENDS[backend]
+
+
+def loads(content):
+    """Decodes a JSON response body."""
+    return _loads(content)
+
+
+def use_backend(name: str):
+    """Forces a specific JSON backend ('orjson', 'msgspec' or 'json')."""
+    global backend, _loads
+    if name not in BACKENDS:
+        raise ValueError(f"JSON backend '{name}' is not available. Available backends: {', '.join(BACKENDS)}.")
+    backend = name
+    _loads = BACKENDS[name]
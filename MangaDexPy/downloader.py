@@ -1,10 +1,21 @@
-from MangaDexPy import APIError, Chapter, Manga
+from MangaDexPy import MangaDex, Chapter, Manga, NoResultsError, APIError
+import io
 import os
+import json
+import zipfile
+import hashlib
 import time
+import sqlite3
 import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from requests import exceptions as rex
+import logging
 from pathlib import Path
-net_table = {}
+from xml.etree import ElementTree
+CHUNK_SIZE = 65536
+logger = logging.getLogger(__name__)
 
 # This script is provided 'as-is', as an example for library usage.
 # Overriding it in your code is strongly recommended to gain control on it and fine-tune its behavior.
@@ -20,92 +31,617 @@ def page_name_to_integer(page, pages_total):
     return final_name
 
 
-def dl_page(net, page, pages_total, path):
-    """Helper for dl_chapter to download pages with."""
+def dl_page(net, page, pages_total, path, archive=None):
+    """Helper for dl_chapter to download pages with. Pages are streamed to a temporary file, then renamed,
+    or written to a chapter archive if one is given.
+    Returns the file name, size and checksum of the page on success, False otherwise."""
+    name = page_name_to_integer(page.rsplit("/", 1)[1], pages_total)
+    target = str(Path(path + "/" + name))
+    tmp = target + ".part"
+    start = time.monotonic()
     try:
-        with net.client.session.get(page) as p:
-            name = page_name_to_integer(page.rsplit("/", 1)[1], pages_total)
-            with open(str(Path(path + "/" + name)), "wb") as f:
-                f.write(p.content)
-            success = True if p.status_code <= 400 else False
+        with net.client._request("GET", page, stream=True) as p:
+            p.raise_for_status()
+            length = 0
+            digest = hashlib.sha256()
+            with (io.BytesIO() if archive else open(tmp, "wb")) as f:
+                for chunk in p.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    length += len(chunk)
+                if archive:
+                    archive.write(name, f.getvalue())
+            if not archive:
+                os.replace(tmp, target)
             try:
                 cached = True if p.headers["x-cache"] == "HIT" else False
             except KeyError:  # No cache header returned: the client is at fault
                 cached = False
+            duration = int((time.monotonic() - start) * 1000)
+            net.report(page, True, cached, length, duration)
+            net.client.hooks.emit("bytes", url=page, route=net.client._route(page), bytes=length)
+            logger.debug(f"Downloaded {page} in {duration} ms ({length} bytes). "
+                         f"Was cached on server: {cached}.")
+            return {"file": name, "size": length, "sha256": digest.hexdigest()}
+    except rex.RequestException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        net.report(page, False, False, 0, int((time.monotonic() - start) * 1000))
+        logger.warning(f"Request for {page} failed. This was reported to the MD backend.")
+        return False
+
+
+class Manifest:
+    """Records the pages downloaded for each chapter of a manga, so interrupted or re-uploaded chapters are resumed."""
+    def __init__(self, path, verify: bool = False):
+        self.path = Path(path)
+        self.verify = verify
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()
+        self.chapters = {}
+        if self.path.exists():
+            with open(str(self.path), "r") as f:
+                self.chapters = json.load(f).get("chapters", {})
+
+    def save(self):
+        with self.lock:
+            data = json.dumps({"chapters": self.chapters}, indent=1)
+        tmp = str(self.path) + ".part"
+        with self.save_lock:
+            with open(tmp, "w") as f:
+                f.write(data)
+            os.replace(tmp, str(self.path))
+
+    def _intact(self, folder, name, page) -> bool:
+        file = Path(str(folder) + "/" + name)
+        if not page or not file.is_file() or file.stat().st_size != page["size"]:
+            return False
+        if self.verify:
+            digest = hashlib.sha256()
+            with open(str(file), "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+            return digest.hexdigest() == page["sha256"]
+        return True
+
+    def is_current(self, chapter: Chapter, folder, light: bool = False) -> bool:
+        """Checks if a chapter was fully downloaded and has not been updated since, without calling MD@H."""
+        with self.lock:
+            entry = self.chapters.get(chapter.id)
+            if not entry or not entry["complete"] or entry["updated_at"] != chapter.updated_at \
+                    or entry["light"] != light:
+                return False
+            pages = dict(entry["pages"])
+        return all(self._intact(folder, k, v) for k, v in pages.items())
+
+    def begin(self, state) -> set:
+        """Starts tracking a chapter download. Returns the indexes of the pages that need to be downloaded."""
+        pages = state.pages()
+        names = [page_name_to_integer(x.rsplit("/", 1)[1], len(pages)) for x in pages]
+        stale = []
+        with self.lock:
+            entry = self.chapters.get(state.chapter.id)
+            if not entry or entry["hash"] != state.net.hash or entry["light"] != state.light:
+                stale = list(entry["pages"]) if entry else []
+                entry = {"hash": state.net.hash, "light": state.light, "pages": {}}
+                self.chapters[state.chapter.id] = entry
+            entry["updated_at"] = state.chapter.updated_at
+            entry["folder"] = Path(state.path).name
+            recorded = dict(entry["pages"])
+        # Pages of a re-uploaded chapter are removed, so none of them is left over if it now has fewer pages.
+        for x in stale:
             try:
-                net.report(page, success, cached, len(p.content), int(p.elapsed.microseconds/1000))
-            except APIError:
-                print("Network report failed. If you're downloading from upstream, this is normal... I guess?")
-            print(f"Statistics for {page}\nTime: {int(p.elapsed.microseconds/1000)}, length: {len(p.content)}"
-                  f"\nSuccess: {success}, was cached on server: {cached}\nHeaders: {p.headers}")
+                os.remove(str(Path(state.path) / x))
+            except FileNotFoundError:
+                pass
+        todo = {i for i, x in enumerate(names) if not self._intact(state.path, x, recorded.get(x))}
+        with self.lock:
+            entry["complete"] = not todo
+        return todo
+
+    def record(self, state, page: dict, finished: bool):
+        with self.lock:
+            entry = self.chapters[state.chapter.id]
+            entry["pages"][page["file"]] = {"size": page["size"], "sha256": page["sha256"]}
+            entry["complete"] = finished
+        if finished:
+            self.save()
+
+
+class ChapterArchive:
+    """Writes the pages of a chapter to a CBZ archive, without compression, as they are downloaded.
+    Pages are written in reading order: the ones arriving early are held until the pages before them are written.
+    The archive is moved into place once every page was written, and discarded if some are missing."""
+    def __init__(self, path, names, info: str = None):
+        self.path = str(path)
+        self.names = sorted(names)
+        self.next = 0
+        self.held = {}
+        self.lock = threading.Lock()
+        self.zip = zipfile.ZipFile(self.path + ".part", "w", zipfile.ZIP_STORED)
+        if info:
+            self.zip.writestr("ComicInfo.xml", info)
+
+    def write(self, name: str, data: bytes):
+        with self.lock:
+            self.held[name] = data
+            while self.next < len(self.names) and self.names[self.next] in self.held:
+                self.zip.writestr(self.names[self.next], self.held.pop(self.names[self.next]))
+                self.next += 1
+
+    def close(self) -> bool:
+        """Finishes the archive. Returns False and removes it if pages are missing."""
+        with self.lock:
+            self.zip.close()
+            if self.next < len(self.names):
+                os.remove(self.path + ".part")
+                logger.error(f"Discarded {self.path}: {len(self.names) - self.next} pages could not be written.")
+                return False
+            os.replace(self.path + ".part", self.path)
             return True
-    except rex.RequestException:
-        net.report(page, False, False, 0, 0)
-        print(f"Request for {page} failed. This was reported to the MD backend, you should try to download the image"
-              f" again to get a new server.")
+
+
+def comic_info(chapter: Chapter, manga: Manga = None) -> str:
+    """Builds a ComicInfo.xml document describing a chapter."""
+    manga = manga or (chapter.parent_manga if isinstance(chapter.parent_manga, Manga) else None)
+    root = ElementTree.Element("ComicInfo")
+    fields = [("Title", chapter.title), ("Number", chapter.chapter), ("Volume", chapter.volume),
+              ("LanguageISO", chapter.language), ("Web", f"https://mangadex.org/chapter/{chapter.id}")]
+    if chapter.published_at:
+        fields += [("Year", chapter.published_at[:4]), ("Month", chapter.published_at[5:7].lstrip("0")),
+                   ("Day", chapter.published_at[8:10].lstrip("0"))]
+    if manga:
+        fields += [("Series", _localized(manga.title)), ("Summary", _localized(manga.desc)),
+                   ("Writer", ", ".join(x.name for x in manga.author if not isinstance(x, str))),
+                   ("Penciller", ", ".join(x.name for x in manga.artist if not isinstance(x, str))),
+                   ("Genre", ", ".join(_localized(x.name) for x in manga.tags)),
+                   ("AgeRating", "Adults Only 18+" if manga.content == "pornographic" else None)]
+    for tag, value in fields:
+        if value:
+            ElementTree.SubElement(root, tag).text = str(value)
+    return ElementTree.tostring(root, encoding="unicode")
+
+
+def _localized(value) -> str:
+    if isinstance(value, dict):
+        return value.get("en") or next(iter(value.values()), "")
+    return value or ""
+
+
+class ChapterState:
+    """Holds the MD@H node assignment of a chapter being downloaded, shared by the threads fetching its pages."""
+    __slots__ = ("chapter", "path", "light", "net", "lock", "manifest", "remaining", "unsettled", "archive")
+
+    def __init__(self, chapter: Chapter, path, light: bool = False, manifest: Manifest = None, cbz: bool = False):
+        self.chapter = chapter
+        self.path = path
+        self.light = light
+        self.net = chapter.get_md_network()
+        self.lock = threading.Lock()
+        self.manifest = None if cbz else manifest
+        self.remaining = self.manifest.begin(self) if self.manifest else set(range(len(self.pages())))
+        self.unsettled = len(self.remaining)
+        self.archive = None
+        if cbz:
+            pages = self.pages()
+            self.archive = ChapterArchive(path, [page_name_to_integer(x.rsplit("/", 1)[1], len(pages))
+                                                 for x in pages], comic_info(chapter))
+
+    def pages(self, net=None):
+        net = net or self.net
+        return net.pages_redux if self.light else net.pages
+
+    def current(self):
+        """Gets the current MD@H node assignment, renewing it before it expires."""
+        net = self.net
+        if net.expires_soon(self.chapter.client.nodes.refresh_margin):
+            return self.refresh(net)
+        return net
+
+    def refresh(self, failed):
+        """Gets a new MD@H node, unless another thread already replaced the failed one.
+        If MD@H hands out the same unhealthy node again, a node listening on port 443 is requested instead."""
+        with self.lock:
+            if self.net is failed:
+                nodes = self.chapter.client.nodes
+                net = self.chapter.get_md_network()
+                if net.node_url == failed.node_url and not nodes.healthy(net.node_url):
+                    net = self.chapter.get_md_network(force_443=True)
+                self.net = net
+                logger.info(f"Got assigned a new MD@H node to download: {self.net.node_url}. "
+                            f"Resuming downloads...")
+            return self.net
+
+    def done(self, index: int, page: dict = None):
+        """Records the outcome of a page, which is None if it could not be downloaded."""
+        with self.lock:
+            if page:
+                self.remaining.discard(index)
+            self.unsettled -= 1
+            finished = not self.remaining
+            settled = not self.unsettled
+        if self.manifest and page:
+            self.manifest.record(self, page, finished)
+        if self.archive and settled:
+            self.archive.close()
+
+
+class DownloadPool:
+    """Downloads pages from many chapters at once using a fixed number of threads.
+    At most per_node pages are fetched from the same MD@H node at once. Pages assigned to a busy node wait in that
+    node's queue without holding a thread, and are handed back to the pool when one of its downloads finishes."""
+    def __init__(self, workers: int = 8, per_node: int = 4):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.per_node = per_node
+        self.busy = {}
+        self.waiting = {}
+        self.pending = 0
+        self.errors = []
+        self.lock = threading.Lock()
+        self.settled = threading.Condition(self.lock)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add_chapter(self, chapter: Chapter, path, light: bool = False, manifest: Manifest = None,
+                    cbz: bool = False) -> ChapterState:
+        """Schedules every page of a chapter, or only the missing ones if a manifest is given."""
+        state = ChapterState(chapter, path, light, manifest, cbz)
+        logger.info(f"Got assigned a MD@H node to download: {state.net.node_url}. "
+                    f"Attempting to download {len(state.remaining)} pages.")
+        with self.lock:
+            self.pending += len(state.remaining)
+        for x in sorted(state.remaining):
+            self.executor.submit(self._page_target, state, x, 0)
+        return state
+
+    def _page_target(self, state: ChapterState, index: int, attempt: int):
+        """Makes one attempt at a page, or parks it if its node is busy. Failed attempts are submitted again."""
+        nodes = state.chapter.client.nodes
+        resp = None
+        try:
+            net = _page_node(state, attempt)
+            if net is not None:
+                with self.lock:
+                    if self.busy.get(net.node_url, 0) >= self.per_node:
+                        self.waiting.setdefault(net.node_url, deque()).append((state, index, attempt))
+                        return
+                    self.busy[net.node_url] = self.busy.get(net.node_url, 0) + 1
+                try:
+                    resp = _fetch_page(state, net, index)
+                finally:
+                    self._release(net.node_url)
+                if not resp:
+                    time.sleep(nodes.backoff(attempt))
+            if not resp and attempt + 1 < nodes.max_attempts:
+                self.executor.submit(self._page_target, state, index, attempt + 1)
+                return
+            if not resp:
+                logger.error(f"Giving up on page {index + 1} of chapter {state.chapter.id} "
+                             f"after {nodes.max_attempts} attempts.")
+        except Exception as e:
+            with self.lock:
+                self.errors.append(e)
+        self._settle(state, index, resp)
+
+    def _release(self, node_url: str):
+        with self.lock:
+            self.busy[node_url] -= 1
+            queue = self.waiting.get(node_url)
+            job = queue.popleft() if queue else None
+        if job:
+            self.executor.submit(self._page_target, *job)
+
+    def _settle(self, state: ChapterState, index: int, resp):
+        # Every page must settle, even on unexpected errors, for the chapter's archive to be closed.
+        try:
+            state.done(index, resp or None)
+        except Exception as e:
+            with self.lock:
+                self.errors.append(e)
+        with self.settled:
+            self.pending -= 1
+            self.settled.notify_all()
+
+    def wait(self):
+        """Blocks until every scheduled page is downloaded. The first error raised by a page is raised once
+        every page has settled, so no thread is still writing to a chapter when the caller handles it."""
+        with self.settled:
+            while self.pending:
+                self.settled.wait()
+            errors, self.errors = self.errors, []
+        if errors:
+            raise errors[0]
+
+    def close(self):
+        try:
+            self.wait()
+        finally:
+            self.executor.shutdown()
+
+
+def _page_node(state: ChapterState, attempt: int):
+    """Gets the MD@H node to fetch a page from, or None after waiting out a failed request for one."""
+    nodes = state.chapter.client.nodes
+    try:
+        net = state.current()
+        if not nodes.healthy(net.node_url):
+            net = state.refresh(net)
+        return net
+    except (APIError, rex.RequestException) as e:
+        logger.warning(f"Could not get a MD@H node for chapter {state.chapter.id}: {e!r}")
+        time.sleep(nodes.backoff(attempt))
+        return None
+
+
+def _fetch_page(state: ChapterState, net, index: int):
+    pages = state.pages(net)
+    start = time.monotonic()
+    resp = dl_page(net, pages[index], len(pages), state.path, state.archive)
+    state.chapter.client.nodes.record(net.node_url, bool(resp), time.monotonic() - start)
+    return resp
+
+
+def _page_target(state: ChapterState, index: int):
+    nodes = state.chapter.client.nodes
+    resp = False
+    try:
+        for attempt in range(nodes.max_attempts):
+            net = _page_node(state, attempt)
+            if net is None:
+                continue
+            resp = _fetch_page(state, net, index)
+            if resp:
+                return True
+            time.sleep(nodes.backoff(attempt))
+        logger.error(f"Giving up on page {index + 1} of chapter {state.chapter.id} "
+                     f"after {nodes.max_attempts} attempts.")
         return False
+    finally:
+        # Every page must settle, even on unexpected errors, for the chapter's archive to be closed.
+        state.done(index, resp or None)
 
 
-def _page_target(chapter, page, pages, path):
-    global net_table
-    net = net_table[chapter.id]
-    while True:
-        resp = dl_page(net, page, pages, path)
-        if resp:
-            break
-        else:
-            net_table[chapter.id] = chapter.get_md_network()
-            print(f"Got assigned a new MD@H node to download: {net.node_url}. Resuming downloads...")
-
-
-def dl_chapter(chapter: Chapter, path, light: bool = False, time_controller: int = 1):
-    """Downloads an entire chapter."""
-    global net_table
-    net_table[chapter.id] = chapter.get_md_network()
-    net = net_table[chapter.id]
-    print(f"Got assigned a MD@H node to download: {net.node_url}. Attempting to download {len(net.pages)} pages.")
-    pages = net.pages_redux if light else net.pages
+def dl_chapter(chapter: Chapter, path, light: bool = False, time_controller: int = 1, manifest: Manifest = None,
+               cbz: bool = False):
+    """Downloads an entire chapter, or only the missing pages if a manifest is given.
+    In CBZ mode, path is the archive to create instead of a folder, and manifests are not used."""
+    state = ChapterState(chapter, path, light, manifest, cbz)
+    pages = sorted(state.remaining)
+    logger.info(f"Got assigned a MD@H node to download: {state.net.node_url}. "
+                f"Attempting to download {len(pages)} pages.")
     for x in pages:
-        _page_target(chapter, x, len(pages), path)
+        _page_target(state, x)
         if time_controller:
             time.sleep(time_controller)
-    net_table.pop(chapter.id)
-    print(f"Successfully downloaded and reported status for {len(net.pages)} pages.")
-
-
-def threaded_dl_chapter(chapter: Chapter, path, light: bool = False):
-    """Downloads an entire chapter using threads."""
-    global net_table
-    net_table[chapter.id] = chapter.get_md_network()
-    net = net_table[chapter.id]
-    print(f"Got assigned a MD@H node to download: {net.node_url}. Attempting to download {len(net.pages)} pages.")
-    pages = net.pages_redux if light else net.pages
-    threads = []
-    for x in pages:
-        t = threading.Thread(target=_page_target, args=[chapter, x, len(pages), path])
-        threads.append(t)
-    for y in range(len(threads)):
-        threads[y].start()
-    for y in range(len(threads)):
-        threads[y].join()
-    net_table.pop(chapter.id)
-    print(f"Successfully ran {len(net.pages)} threads.")
+    logger.info(f"Successfully downloaded and reported status for {len(pages)} pages.")
+
+
+def threaded_dl_chapter(chapter: Chapter, path, light: bool = False, workers: int = 8, manifest: Manifest = None,
+                        cbz: bool = False):
+    """Downloads an entire chapter using a pool of threads."""
+    with DownloadPool(workers) as pool:
+        state = pool.add_chapter(chapter, path, light, manifest, cbz)
+    logger.info(f"Successfully downloaded and reported status for {len(state.pages())} pages.")
 
 
 def dl_manga(manga: Manga, base_path, language: str = "en", light: bool = False, time_controller: int = 1,
-             threaded: bool = False):
-    """Downloads an entire manga."""
+             threaded: bool = False, workers: int = 8, manifest: bool = True, cbz: bool = False):
+    """Downloads an entire manga. In threaded mode, pages from every chapter share one pool of threads.
+    With a manifest (stored as manifest.json in base_path), only missing or updated pages are downloaded on re-runs;
+    without it, chapters with an existing folder are skipped. Chapters sharing a volume and chapter number get the
+    start of their id appended to their folder name.
+    In CBZ mode, each chapter is written to a .cbz archive instead of a folder, and existing archives are skipped."""
     bp = Path(base_path)
     chs = manga.get_chapters()
     chs = [x for x in chs if x.language == language]
-    for ch in chs:
-        cp = Path(str(bp) + f"/Vol.{ch.volume} Ch.{ch.chapter}")
-        if cp.exists():
-            print(f"Folder for {str(cp)} already exists, skipping chapter.")
-        else:
-            os.mkdir(str(cp))
-            if threaded:
-                threaded_dl_chapter(ch, str(cp), light)
+    mf = Manifest(str(bp) + "/manifest.json") if manifest and not cbz else None
+    pool = DownloadPool(workers) if threaded else None
+    try:
+        for ch, name in _folder_names(chs):
+            cp = Path(str(bp) + f"/{name}" + (".cbz" if cbz else ""))
+            if mf and mf.is_current(ch, cp, light):
+                logger.info(f"Chapter in {str(cp)} is up to date, skipping chapter.")
+            elif not mf and cp.exists():
+                logger.info(f"{'Archive' if cbz else 'Folder'} for {str(cp)} already exists, skipping chapter.")
             else:
-                dl_chapter(ch, str(cp), light, time_controller)
-    print(f"Successfully processed {len(chs)} chapters.")
+                if not cbz:
+                    cp.mkdir(exist_ok=True)
+                if pool:
+                    pool.add_chapter(ch, str(cp), light, mf, cbz)
+                else:
+                    dl_chapter(ch, str(cp), light, time_controller, mf, cbz)
+    finally:
+        if pool:
+            pool.close()
+        if mf:
+            mf.save()
+    logger.info(f"Successfully processed {len(chs)} chapters.")
+
+
+def _folder_names(chs):
+    """Names the folder of each chapter. Chapters sharing a volume and chapter number (uploaded by different groups)
+    get the start of their id appended, so they never download into the same folder."""
+    names = [f"Vol.{ch.volume} Ch.{ch.chapter}" for ch in chs]
+    counts = {}
+    for x in names:
+        counts[x] = counts.get(x, 0) + 1
+    return [(ch, x if counts[x] == 1 else f"{x} [{ch.id[:8]}]") for ch, x in zip(chs, names)]
+
+
+class WorkQueue:
+    """Represents an on-disk queue of chapters to download, shared by the processes of a mirror.
+    Each process must open its own WorkQueue on the same file."""
+    def __init__(self, path):
+        self.path = str(path)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+        with self.lock:
+            self.db.execute("CREATE TABLE IF NOT EXISTS jobs (chapter TEXT PRIMARY KEY, manga TEXT, folder TEXT, "
+                            "data TEXT, state TEXT, worker INTEGER, attempts INTEGER, updated REAL)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state)")
+
+    def _transaction(self, statements):
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements()
+                self.db.execute("COMMIT")
+                return result
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+
+    def add(self, chapter: Chapter, folder) -> bool:
+        """Queues a chapter, unless it already is. Chapters updated since they were downloaded are queued again."""
+        def statements():
+            row = self.db.execute("SELECT data, state FROM jobs WHERE chapter = ?", (chapter.id,)).fetchone()
+            if row is not None and (row[1] == "running" or
+                                    json.loads(row[0])["attributes"].get("updatedAt") == chapter.updated_at):
+                return False
+            data = chapter.to_dict()
+            manga = next((x["id"] for x in data["relationships"] if x["type"] == "manga"), None)
+            self.db.execute("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, 'pending', NULL, 0, ?)",
+                            (chapter.id, manga, str(folder), json.dumps(data), time.time()))
+            return True
+        return self._transaction(statements)
+
+    def claim(self, worker: int):
+        """Takes the next pending chapter. Returns its id, folder and data, or None if there is nothing left."""
+        def statements():
+            row = self.db.execute("SELECT chapter, folder, data FROM jobs WHERE state = 'pending' "
+                                  "ORDER BY rowid LIMIT 1").fetchone()
+            if row is not None:
+                self.db.execute("UPDATE jobs SET state = 'running', worker = ?, updated = ? WHERE chapter = ?",
+                                (worker, time.time(), row[0]))
+            return row
+        return self._transaction(statements)
+
+    def finish(self, chapter: str, success: bool, max_attempts: int = 3):
+        """Marks a chapter as done, or puts it back in the queue until it failed max_attempts times."""
+        def statements():
+            if success:
+                self.db.execute("UPDATE jobs SET state = 'done', worker = NULL, updated = ? WHERE chapter = ?",
+                                (time.time(), chapter))
+            else:
+                self.db.execute("UPDATE jobs SET attempts = attempts + 1, worker = NULL, updated = ?, "
+                                "state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END "
+                                "WHERE chapter = ?", (time.time(), max_attempts, chapter))
+        self._transaction(statements)
+
+    def recover(self, worker: int = None) -> int:
+        """Puts chapters left running by crashed processes (or by one of them) back in the queue."""
+        def statements():
+            if worker is None:
+                cur = self.db.execute("UPDATE jobs SET state = 'pending', worker = NULL WHERE state = 'running'")
+            else:
+                cur = self.db.execute("UPDATE jobs SET state = 'pending', worker = NULL "
+                                      "WHERE state = 'running' AND worker = ?", (worker,))
+            return cur.rowcount
+        return self._transaction(statements)
+
+    def retry_failed(self) -> int:
+        def statements():
+            return self.db.execute("UPDATE jobs SET state = 'pending', attempts = 0 WHERE state = 'failed'").rowcount
+        return self._transaction(statements)
+
+    def progress(self) -> dict:
+        """Counts chapters by state."""
+        with self.lock:
+            counts = dict(self.db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+        return {x: counts.get(x, 0) for x in ("pending", "running", "done", "failed")}
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+def _mirror_worker(queue_path, index: int, processes: int, light: bool, workers: int, client_factory):
+    client = client_factory()
+    # API limits apply to the whole mirror, while page downloads are spread over many MD@H nodes.
+    client.limiter.share(1 / processes, ("api", "at-home"))
+    queue = WorkQueue(queue_path)
+    try:
+        with DownloadPool(workers) as pool:
+            while True:
+                job = queue.claim(index)
+                if job is None:
+                    break
+                chapter = Chapter(json.loads(job[2]), client)
+                folder = Path(job[1])
+                folder.mkdir(parents=True, exist_ok=True)
+                manifest = Manifest(str(folder / ".manifest.json"))
+                try:
+                    pool.add_chapter(chapter, str(folder), light, manifest)
+                    pool.wait()
+                    success = manifest.is_current(chapter, folder, light)
+                except Exception:  # Any failure must put the chapter back in the queue, not kill the process
+                    logger.exception(f"Worker {index} failed to download chapter {chapter.id}.")
+                    success = False
+                queue.finish(chapter.id, success)
+    finally:
+        client.reporter.close()
+        queue.close()
+
+
+def mirror(mangas, base_path, language: str = "en", light: bool = False, processes: int = None, workers: int = 8,
+           client_factory=MangaDex, interval: float = 10, progress=None) -> dict:
+    """Mirrors many mangas using several processes, each with its own client and share of the API rate limits.
+    Chapters are queued in mirror.sqlite in base_path, then claimed by the processes. Running the mirror again
+    resumes it: finished chapters are skipped, interrupted ones are resumed, and updated ones are downloaded again.
+    Crashed processes are restarted. Progress is logged every interval seconds, and passed to the progress
+    callback if one is given. client_factory must be picklable, and is called once in each process.
+    Returns the number of chapters by state."""
+    bp = Path(base_path)
+    bp.mkdir(parents=True, exist_ok=True)
+    processes = processes or os.cpu_count() or 1
+    queue = WorkQueue(bp / "mirror.sqlite")
+    queue.recover()
+    for mg in mangas:
+        try:
+            chs = [x for x in mg.get_chapters() if x.language == language]
+        except NoResultsError:
+            continue
+        for ch, name in _folder_names(chs):
+            queue.add(ch, bp / mg.id / name)
+    logger.info(f"Mirroring with {processes} processes: {queue.progress()}.")
+    procs = {}
+    restarts = 0
+
+    def start(index):
+        procs[index] = multiprocessing.Process(target=_mirror_worker, daemon=True,
+                                               args=(queue.path, index, processes, light, workers, client_factory))
+        procs[index].start()
+    for x in range(processes):
+        start(x)
+    try:
+        while procs:
+            time.sleep(interval)
+            for x, proc in list(procs.items()):
+                if proc.is_alive():
+                    continue
+                del procs[x]
+                if proc.exitcode != 0:
+                    queue.recover(x)
+                    if restarts < processes * 3:
+                        logger.warning(f"Worker {x} exited with code {proc.exitcode}, restarting it.")
+                        restarts += 1
+                        start(x)
+                    else:
+                        logger.error(f"Worker {x} exited with code {proc.exitcode}, too many restarts.")
+            state = queue.progress()
+            logger.info(f"Mirror progress: {state['done']} done, {state['running']} running, "
+                        f"{state['pending']} pending, {state['failed']} failed.")
+            if progress:
+                progress(state)
+    finally:
+        for proc in procs.values():
+            proc.terminate()
+        for proc in procs.values():
+            proc.join()
+        state = queue.progress()
+        queue.close()
+    return state
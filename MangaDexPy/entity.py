@@ -0,0 +1,78 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+
+class EntityMap:
+    """Deduplicates model objects by id, keeping the most recently used ones.
+    When newer data is seen for a known id, it is merged into the existing object. Data with the same updatedAt
+    is only merged if it has more attributes or relationships. Data without a relationships key, like an object
+    embedded in another one's relationships, only updates attributes: the fields listed in the class'
+    RELATIONSHIP_SLOTS are kept."""
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def resolve(self, cls, data, client):
+        key = (cls, data.get("id"))
+        richness = _richness(data)
+        updated = (data.get("attributes") or {}).get("updatedAt") or ""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                if (updated, richness) <= (entry[2], entry[1]):
+                    return entry[0]
+        obj = cls(data, client)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.entries[key] = (obj, richness, updated)
+                if len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+                return obj
+            if (updated, richness) <= (entry[2], entry[1]):
+                return entry[0]
+            kept = () if "relationships" in data else getattr(cls, "RELATIONSHIP_SLOTS", ())
+            for x in cls.__slots__:
+                if x not in kept:
+                    setattr(entry[0], x, getattr(obj, x))
+            self.entries[key] = (entry[0], max(richness, entry[1]) if kept else richness, updated)
+            return entry[0]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def _richness(data) -> int:
+    return len(data.get("attributes") or {}) + sum(2 if "attributes" in x else 1
+                                                   for x in data.get("relationships", []))
+
+
+def resolve(cls, data, client):
+    """Builds a model object, going through the client's identity map if it has one."""
+    entities = getattr(client, "entities", None)
+    if entities is None:
+        return cls(data, client)
+    return entities.resolve(cls, data, client)
+
+
+def stubs(kind: str, values) -> List[dict]:
+    """Builds relationship stubs, keeping only the type and id, from model objects or ids."""
+    return [{"type": kind, "id": x if isinstance(x, str) else x.id} for x in values if x is not None]
+
+
+def index_relationships(relationships, classes: dict, client) -> Dict[str, list]:
+    """Groups relationships by type in a single pass. Expanded relationships of the types in classes are built into
+    model objects through the client's identity map, so they are not kept in memory once per referencing object.
+    Relationships that were not expanded are kept as ids."""
+    index = {}
+    for x in relationships:
+        cls = classes.get(x["type"])
+        index.setdefault(x["type"], []).append(resolve(cls, x, client) if cls and "attributes" in x else x["id"])
+    return index
@@ -1,12 +1,18 @@
+from .entity import stubs, index_relationships
+from .user import User
+
+RELATIONSHIPS = {"leader": User, "member": User}
+
+
 class Group:
     """Represents a MangaDex Group."""
     __slots__ = ("id", "name", "desc", "website", "irc_server", "irc_channel", "discord", "email", "locked",
                  "official", "verified", "leader", "members", "created_at", "updated_at", "client")
+    RELATIONSHIP_SLOTS = ("leader", "members")
 
     def __init__(self, data, client):
         self.id = data.get("id")
         _attrs = data.get("attributes")
-        _rel = data.get("relationships", [])
         self.name = _attrs.get("name")
         self.desc = _attrs.get("description")
         self.website = _attrs.get("website")
@@ -19,16 +25,16 @@ class Group:
         self.verified = _attrs.get("verified")
         self.created_at = _attrs.get("createdAt")
         self.updated_at = _attrs.get("updatedAt")
-        try:
-            _members = [x["attributes"] for x in _rel if x["type"] == "member"]
-            from .user import User
-            self.members = [User(x, client) for x in _rel if x["type"] == "member"]
-        except (IndexError, KeyError):
-            self.members = [x["id"] for x in _rel if x["type"] == "member"]
-        try:
-            _leader = [x["attributes"] for x in _rel if x["type"] == "leader"]
-            from .user import User
-            self.leader = next((User(x, client) for x in _rel if x["type"] == "leader"), None)
-        except (IndexError, KeyError):
-            self.leader = next((x["id"] for x in _rel if x["type"] == "leader"), None)
         self.client = client
+        _rel = index_relationships(data.get("relationships", []), RELATIONSHIPS, client)
+        self.leader = next(iter(_rel.get("leader", [])), None)
+        self.members = _rel.get("member", [])
+
+    def to_dict(self) -> dict:
+        """Rebuilds the API object of this group, with stubs for its relationships."""
+        return {"id": self.id, "type": "scanlation_group", "attributes": {
+            "name": self.name, "description": self.desc, "website": self.website, "ircServer": self.irc_server,
+            "ircChannel": self.irc_channel, "discord": self.discord, "contactEmail": self.email,
+            "locked": self.locked, "official": self.official, "verified": self.verified,
+            "createdAt": self.created_at, "updatedAt": self.updated_at},
+            "relationships": stubs("leader", [self.leader]) + stubs("member", self.members)}
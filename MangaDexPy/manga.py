@@ -1,13 +1,22 @@
+from .entity import stubs, index_relationships
+from .author import Author
+from .cover import Cover
+
+RELATIONSHIPS = {"author": Author, "artist": Author, "cover_art": Cover}
+
+
 class Manga:
-    """Represents a MangaDex Manga."""
+    """Represents a MangaDex Manga. Tags are decoded the first time they are accessed."""
     __slots__ = ("id", "title", "titles", "desc", "links", "language", "last_volume", "last_chapter",
-                 "type", "status", "year", "content", "tags", "created_at", "updated_at", "author", "artist", "cover",
-                 "client")
+                 "type", "status", "year", "content", "created_at", "updated_at", "author", "artist", "cover",
+                 "client", "_tag_data", "_tags")
+    RELATIONSHIP_SLOTS = ("author", "artist", "cover")
 
     def __init__(self, data, client):
+        self._tags = None
         self.id = data.get("id")
         _attrs = data.get("attributes")
-        _rel = data.get("relationships", [])
+        self._tag_data = _attrs.get("tags")
         self.title = _attrs.get("title")
         self.titles = _attrs.get("altTitles")
         self.desc = _attrs.get("description")
@@ -19,37 +28,48 @@ class Manga:
         self.status = _attrs.get("status")
         self.year = _attrs.get("year")
         self.content = _attrs.get("contentRating")
-        self.tags = [MangaTag(x) for x in _attrs.get("tags")]
         self.created_at = _attrs.get("createdAt")
         self.updated_at = _attrs.get("updatedAt")
-        try:
-            _author = [x["attributes"] for x in _rel if x["type"] == "author"]
-            from .author import Author
-            self.author = [Author(x, client) for x in _rel if x["type"] == "author"]
-        except (IndexError, KeyError):
-            self.author = [x["id"] for x in _rel if x["type"] == "author"]
-        try:
-            _artist = [x["attributes"] for x in _rel if x["type"] == "artist"]
-            from .author import Author
-            self.artist = [Author(x, client) for x in _rel if x["type"] == "artist"]
-        except (IndexError, KeyError):
-            self.artist = [x["id"] for x in _rel if x["type"] == "artist"]
-        try:
-            _cover = [x["attributes"] for x in _rel if x["type"] == "cover_art"]
-            from .cover import Cover
-            _related_cover = next((x for x in _rel if x["type"] == "cover_art"), None)
-            if _related_cover is not None:
-                _related_cover["relationships"] = [{"type": "manga", "id": self.id}]
-                _related_cover = Cover(_related_cover, client)
-            self.cover = _related_cover
-        except (IndexError, KeyError):
-            self.cover = next((x["id"] for x in _rel if x["type"] == "cover_art"), None)
         self.client = client
+        # Covers do not carry their manga when they are included, while Cover needs it to build its URLs.
+        _rel = index_relationships([dict(x, relationships=[{"type": "manga", "id": self.id}])
+                                    if x["type"] == "cover_art" else x for x in data.get("relationships", [])],
+                                   RELATIONSHIPS, client)
+        self.author = _rel.get("author", [])
+        self.artist = _rel.get("artist", [])
+        self.cover = next(iter(_rel.get("cover_art", [])), None)
+
+    @property
+    def tags(self):
+        if self._tags is None:
+            self._tags = [MangaTag(x) for x in self._tag_data or []]
+        return self._tags
+
+    @tags.setter
+    def tags(self, value):
+        self._tags = value
+        self._tag_data = None
+
+    def to_dict(self) -> dict:
+        """Rebuilds the API object of this manga, with stubs for its relationships."""
+        return {"id": self.id, "type": "manga", "attributes": {
+            "title": self.title, "altTitles": self.titles, "description": self.desc, "links": self.links,
+            "originalLanguage": self.language, "lastVolume": self.last_volume, "lastChapter": self.last_chapter,
+            "publicationDemographic": self.type, "status": self.status, "year": self.year,
+            "contentRating": self.content,
+            "tags": [x.to_dict() for x in self._tags] if self._tag_data is None else self._tag_data,
+            "createdAt": self.created_at, "updatedAt": self.updated_at},
+            "relationships": stubs("author", self.author) + stubs("artist", self.artist) +
+            stubs("cover_art", [self.cover])}
 
     def get_chapters(self, params=None, includes=None):
         includes = self.client.constants.get("INCLUDE_ALL") if not includes else includes
         return self.client.get_manga_chapters(self, params, includes)
 
+    def iter_chapters(self, params=None, includes=None):
+        includes = self.client.constants.get("INCLUDE_ALL") if not includes else includes
+        return self.client.iter_manga_chapters(self, params, includes)
+
     def get_covers(self, params=None):
         return self.client.get_manga_covers(self, params)
 
@@ -61,3 +81,6 @@ class MangaTag:
     def __init__(self, data):
         self.id = data.get("id")
         self.name = data.get("attributes").get("name")
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "type": "tag", "attributes": {"name": self.name}}
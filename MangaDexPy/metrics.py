@@ -0,0 +1,134 @@
+import re
+import logging
+import threading
+from urllib.parse import urlparse
+from typing import Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+EVENTS = ("request_start", "request_end", "retry", "rate_limit_wait", "bytes", "cache_hit", "coalesced")
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+_UUID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+
+class Hooks:
+    """Dispatches client events to registered callbacks.
+    Callbacks are called with the event name and a dict describing it. Exceptions they raise are logged and ignored."""
+    def __init__(self):
+        self.callbacks = {x: [] for x in EVENTS}
+
+    def register(self, event: str, callback: Callable[[str, dict], None]):
+        self.callbacks[event].append(callback)
+
+    def unregister(self, event: str, callback: Callable[[str, dict], None]):
+        self.callbacks[event].remove(callback)
+
+    def emit(self, event: str, **info):
+        for callback in self.callbacks[event]:
+            try:
+                callback(event, info)
+            except Exception:  # A broken callback must never break a request
+                logger.exception(f"Hook {callback!r} failed on {event}.")
+
+
+class Histogram:
+    """Represents a cumulative latency histogram."""
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Aggregates client events into counters and latency histograms, per API endpoint and per MD@H node."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def attach(self, client) -> "Metrics":
+        """Registers this aggregator on a client's hooks."""
+        for event in EVENTS:
+            client.hooks.register(event, self)
+        return self
+
+    def detach(self, client):
+        for event in EVENTS:
+            client.hooks.unregister(event, self)
+
+    @staticmethod
+    def _labels(url: str, route: str) -> Tuple[str, str]:
+        u = urlparse(url)
+        if route in ("node", "uploads"):
+            return "node", f"{u.scheme}://{u.netloc}"
+        return "endpoint", _UUID.sub("{id}", u.path)
+
+    def _inc(self, name: str, labels: tuple, value: float = 1):
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def __call__(self, event: str, info: dict):
+        label = self._labels(info["url"], info["route"])
+        with self.lock:
+            if event == "request_end":
+                self._inc("requests_total", (label, ("status", str(info["status"]))))
+                key = ("request_duration_seconds" if label[0] == "endpoint" else "node_duration_seconds", (label,))
+                self.histograms.setdefault(key, Histogram()).observe(info["duration"])
+            elif event == "retry":
+                self._inc("retries_total", (label,))
+            elif event == "rate_limit_wait":
+                self._inc("rate_limit_waits_total", (label,))
+                self._inc("rate_limit_wait_seconds_total", (label,), info["duration"])
+            elif event == "bytes":
+                self._inc("bytes_total", (label,), info["bytes"])
+            elif event == "cache_hit":
+                self._inc("cache_hits_total", (label,))
+            elif event == "coalesced":
+                self._inc("coalesced_total", (label,))
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Gets a copy of the current counters and histograms."""
+        with self.lock:
+            return {"counters": {k: v for k, v in self.counters.items()},
+                    "histograms": {k: {"buckets": dict(zip(BUCKETS, v.counts)), "sum": v.sum, "count": v.count}
+                                   for k, v in self.histograms.items()}}
+
+    def prometheus(self, prefix: str = "mangadex") -> str:
+        """Exports the metrics in the Prometheus text format."""
+        lines = []
+        with self.lock:
+            for name in sorted({x[0] for x in self.counters}):
+                lines.append(f"# TYPE {prefix}_{name} counter")
+                for (n, labels), value in sorted(self.counters.items()):
+                    if n == name:
+                        lines.append(f"{prefix}_{name}{_format_labels(labels)} {value}")
+            for name in sorted({x[0] for x in self.histograms}):
+                lines.append(f"# TYPE {prefix}_{name} histogram")
+                for (n, labels), h in sorted(self.histograms.items(), key=lambda x: x[0]):
+                    if n != name:
+                        continue
+                    for bound, count in zip(BUCKETS, h.counts):
+                        lines.append(f"{prefix}_{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {count}")
+                    lines.append(f"{prefix}_{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {h.count}")
+                    lines.append(f"{prefix}_{name}_sum{_format_labels(labels)} {h.sum}")
+                    lines.append(f"{prefix}_{name}_count{_format_labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
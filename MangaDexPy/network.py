@@ -1,4 +1,11 @@
 import time
+import queue
+import atexit
+import random
+import logging
+import threading
+logger = logging.getLogger(__name__)
+_STOP = object()
 
 
 class NetworkChapter:
@@ -18,5 +25,152 @@ class NetworkChapter:
         self.pages_redux = [f"{self.node_url}/data-saver/{self.hash}/{x}" for x in self.files_redux]
         self.client = client
 
+    def expires_soon(self, margin: int = 60) -> bool:
+        """Checks if the node assignment expires within `margin` seconds."""
+        return self.valid_thru - margin <= time.time()
+
     def report(self, url, success, cache_header, req_bytes, req_duration):
-        return self.client.network_report(url, success, cache_header, req_bytes, req_duration)
+        """Queues a report for the MD@H Network. It is sent in the background by the client's reporter."""
+        return self.client.reporter.submit(url, success, cache_header, req_bytes, req_duration)
+
+
+class NodeStats:
+    """Represents the recent health of a MD@H node, as exponentially weighted averages."""
+    __slots__ = ("latency", "error_rate", "samples", "last_seen")
+
+    def __init__(self):
+        self.latency = 0.0
+        self.error_rate = 0.0
+        self.samples = 0
+        self.last_seen = 0.0
+
+
+class NodeManager:
+    """Tracks the latency and error rate of MD@H nodes, to decide when downloads should move to another node."""
+    def __init__(self, max_error_rate: float = 0.5, max_latency: float = 10, min_samples: int = 3,
+                 forget_after: int = 300, max_attempts: int = 6, base_delay: float = 0.5, max_delay: float = 30,
+                 refresh_margin: int = 60, weight: float = 0.3):
+        self.max_error_rate = max_error_rate
+        self.max_latency = max_latency
+        self.min_samples = min_samples
+        self.forget_after = forget_after
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.refresh_margin = refresh_margin
+        self.weight = weight
+        self.nodes = {}
+        self.lock = threading.Lock()
+
+    def record(self, node_url: str, success: bool, duration: float):
+        with self.lock:
+            stats = self.nodes.get(node_url)
+            if stats is None or stats.last_seen < time.time() - self.forget_after:
+                stats = self.nodes[node_url] = NodeStats()
+                stats.latency = duration
+            stats.latency += self.weight * (duration - stats.latency)
+            stats.error_rate += self.weight * ((0.0 if success else 1.0) - stats.error_rate)
+            stats.samples += 1
+            stats.last_seen = time.time()
+
+    def healthy(self, node_url: str) -> bool:
+        """Checks if a node is fast and reliable enough to keep downloading from it."""
+        with self.lock:
+            stats = self.nodes.get(node_url)
+            if stats is None or stats.samples < self.min_samples or stats.last_seen < time.time() - self.forget_after:
+                return True
+            return stats.error_rate <= self.max_error_rate and stats.latency <= self.max_latency
+
+    def backoff(self, attempt: int) -> float:
+        """Gets a bounded, jittered delay before retrying a failed download."""
+        return min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {k: {"latency": v.latency, "error_rate": v.error_rate, "samples": v.samples}
+                    for k, v in self.nodes.items()}
+
+
+class NetworkReporter:
+    """Sends MD@H reports from a background thread, so downloads never wait on them.
+    Queued reports are sent in batches; reports that keep failing, or that overflow the queue, are dropped."""
+    def __init__(self, client, max_pending: int = 1000, batch_size: int = 50, retries: int = 1,
+                 retry_delay: float = 1):
+        self.client = client
+        self.queue = queue.Queue(max_pending)
+        self.batch_size = batch_size
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.sent = 0
+        self.dropped = 0
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def submit(self, url, success, cache_header, req_bytes, req_duration) -> bool:
+        """Queues a report without blocking. Returns False if the queue is full and the report was dropped."""
+        self._start()
+        try:
+            self.queue.put_nowait((url, success, cache_header, req_bytes, req_duration))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _start(self):
+        if self.thread is not None:
+            return
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="MD@H reporter", daemon=True)
+                self.thread.start()
+                atexit.register(self.flush, 5)
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            for report in batch:
+                if report is _STOP:
+                    self.queue.task_done()
+                    return
+                self._send(report)
+                self.queue.task_done()
+
+    def _send(self, report):
+        for attempt in range(self.retries + 1):
+            try:
+                self.client.network_report(*report)
+                self.sent += 1
+                return
+            except Exception as e:  # Reports are best effort: the reporter thread must survive any failure
+                logger.debug(f"Network report for {report[0]} failed: {e!r}")
+                if attempt < self.retries:
+                    time.sleep(self.retry_delay)
+        self.dropped += 1
+
+    def flush(self, timeout: float = None) -> bool:
+        """Waits until every queued report was sent or dropped. Returns False if the timeout expired first."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def close(self, timeout: float = 5):
+        """Sends pending reports, then stops the reporter thread. Reports submitted afterwards start a new one."""
+        with self.lock:
+            if self.thread is None:
+                return
+            atexit.unregister(self.flush)
+            self.flush(timeout)
+            try:
+                self.queue.put(_STOP, timeout=timeout)
+                self.thread.join(timeout)
+            except queue.Full:
+                logger.warning("The MD@H reporter is stuck on a full queue, leaving its thread behind.")
+            self.thread = None
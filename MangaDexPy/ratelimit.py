@@ -0,0 +1,109 @@
+import time
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """Represents a thread-safe token bucket."""
+    __slots__ = ("rate", "capacity", "tokens", "updated", "blocked_until", "lock")
+
+    def __init__(self, rate: Optional[float], capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Takes tokens from the bucket and returns how long the caller must wait before using them."""
+        with self.lock:
+            now = time.monotonic()
+            delay = 0.0
+            if self.rate:
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.tokens -= tokens
+                if self.tokens < 0:
+                    delay = -self.tokens / self.rate
+            self.updated = now
+            return max(delay, self.blocked_until - now)
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Blocks until tokens are available. Returns the time spent waiting."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def block(self, until: float):
+        """Prevents the bucket from handing out tokens until a specific timestamp (wall clock)."""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + until - time.time())
+
+
+class RateLimiter:
+    """Dispatches requests to per-route token buckets and reacts to rate limit headers.
+    Routes without a bucket, such as MD@H nodes ("node") and the MD@H network API ("network"), are not limited."""
+    __slots__ = ("buckets", "backoff")
+
+    def __init__(self, buckets: Dict[str, TokenBucket] = None, backoff: float = 1):
+        self.buckets = buckets if buckets is not None else {
+            "api": TokenBucket(5, 5),
+            "at-home": TokenBucket(40 / 60, 40),
+            "uploads": TokenBucket(20, 20)
+        }
+        self.backoff = backoff
+
+    def reserve(self, route: str) -> float:
+        bucket = self.buckets.get(route)
+        return bucket.reserve() if bucket else 0.0
+
+    def acquire(self, route: str) -> float:
+        bucket = self.buckets.get(route)
+        return bucket.acquire() if bucket else 0.0
+
+    def share(self, fraction: float, routes=None):
+        """Scales buckets (every one by default) down to a fraction of their budget, for clients sharing limits."""
+        for route, bucket in self.buckets.items():
+            if routes is not None and route not in routes:
+                continue
+            with bucket.lock:
+                if bucket.rate:
+                    bucket.rate *= fraction
+                bucket.capacity = max(bucket.capacity * fraction, 1)
+                bucket.tokens = min(bucket.tokens, bucket.capacity)
+
+    def update(self, route: str, status: int, headers) -> Optional[float]:
+        """Blocks a route's bucket based on a response. Returns the timestamp the route is blocked until."""
+        bucket = self.buckets.get(route)
+        if bucket is None:
+            return None
+        until = retry_after(headers)
+        remaining = headers.get("X-RateLimit-Remaining")
+        if status == 429:
+            until = until or time.time() + self.backoff
+        elif not (until and remaining is not None and int(remaining) <= 0):
+            return None
+        bucket.block(until)
+        return until
+
+
+def retry_after(headers) -> Optional[float]:
+    """Gets the timestamp (wall clock) after which requests can be sent again from response headers."""
+    value = headers.get("X-RateLimit-Retry-After")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    value = headers.get("Retry-After")
+    if value:
+        try:
+            return time.time() + float(value)
+        except ValueError:
+            try:
+                return parsedate_to_datetime(value).timestamp()
+            except (TypeError, ValueError):
+                pass
+    return None
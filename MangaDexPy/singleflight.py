@@ -0,0 +1,61 @@
+import asyncio
+import threading
+from typing import Callable, Hashable
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Lets concurrent threads making the same call share a single execution of it.
+    The first caller runs the call; callers arriving while it runs wait for it and get the same result or exception."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key: Hashable, fn: Callable, shared: Callable = None):
+        """Runs fn, unless a call with the same key is in flight. shared is called when a result is reused."""
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if shared:
+                shared()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """Lets concurrent tasks making the same call share a single execution of it.
+    The call runs in its own task, so cancelling one of the waiting callers does not cancel it for the others."""
+    def __init__(self):
+        self.calls = {}
+
+    async def do(self, key: Hashable, fn: Callable, shared: Callable = None):
+        task = self.calls.get(key)
+        if task is None:
+            task = self.calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self.calls.pop(key, None))
+        elif shared:
+            shared()
+        return await asyncio.shield(task)
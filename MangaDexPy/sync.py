@@ -0,0 +1,226 @@
+from MangaDexPy import MangaDex, Manga, Chapter, APIError, NotLoggedInError, INCLUDE_ALL
+from MangaDexPy.entity import resolve
+from MangaDexPy.decoding import loads
+import os
+import json
+import threading
+from pathlib import Path
+from typing import List, Dict, Optional
+
+PAGE_SIZE = 100
+
+
+class FeedCursor:
+    """Represents the position reached in a feed: the latest timestamp seen, and the ids seen at that timestamp.
+    The API's since-filters are inclusive, so those ids are skipped when they come back on the next poll."""
+    __slots__ = ("since", "seen")
+
+    def __init__(self, since: str = None, seen=None):
+        self.since = since
+        self.seen = set(seen or ())
+
+    def to_dict(self) -> dict:
+        return {"since": self.since, "seen": sorted(self.seen)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FeedCursor":
+        return cls(data.get("since"), data.get("seen"))
+
+    def advance(self, items: List[dict], field: str) -> List[dict]:
+        """Moves the cursor past items sorted by field, in ascending order. Returns the ones not seen before."""
+        new = []
+        for x in items:
+            stamp = x["attributes"][field]
+            if self.since is None or stamp > self.since:
+                self.since = stamp
+                self.seen = {x["id"]}
+            elif stamp == self.since and x["id"] not in self.seen:
+                self.seen.add(x["id"])
+            else:
+                continue
+            new.append(x)
+        return new
+
+
+class FeedSync:
+    """Polls chapter feeds incrementally, returning only the chapters created or updated since the last poll.
+    Cursors are kept per feed, and saved to a JSON file if a path is given: poll() saves them once per cycle,
+    other callers must call save() themselves.
+    The first poll of a feed returns its whole content and sets the cursor."""
+    def __init__(self, client: MangaDex, path=None, field: str = "updatedAt"):
+        if field not in ("updatedAt", "createdAt"):
+            raise ValueError(f"Cannot sync on {field}, use updatedAt or createdAt.")
+        self.client = client
+        self.path = Path(path) if path else None
+        self.field = field
+        self.lock = threading.Lock()
+        self.cursors = {}
+        self.dirty = False
+        if self.path and self.path.exists():
+            with open(str(self.path), "r") as f:
+                self.cursors = {k: FeedCursor.from_dict(v) for k, v in json.load(f).get("cursors", {}).items()}
+
+    def save(self):
+        """Writes the cursors to the file, if they changed since they were last written."""
+        if not self.path:
+            return
+        with self.lock:
+            if not self.dirty:
+                return
+            self.dirty = False
+            data = json.dumps({"cursors": {k: v.to_dict() for k, v in self.cursors.items()}}, indent=1)
+            tmp = str(self.path) + ".part"
+            with open(tmp, "w") as f:
+                f.write(data)
+            os.replace(tmp, str(self.path))
+
+    def cursor(self, key: str) -> Optional[FeedCursor]:
+        with self.lock:
+            return self.cursors.get(key)
+
+    def reset(self, key: str = None):
+        """Forgets the cursor of a feed, or of every feed."""
+        with self.lock:
+            if key is None:
+                self.cursors.clear()
+            else:
+                self.cursors.pop(key, None)
+            self.dirty = True
+
+    def _query(self, cursor: FeedCursor, params: dict, offset: int) -> dict:
+        query = {k: v for k, v in params.items() if not k.startswith("order[")}
+        query.update({f"order[{self.field}]": "asc", "limit": PAGE_SIZE, "offset": offset})
+        if cursor.since:
+            # The API only accepts naive timestamps for since-filters.
+            query[f"{self.field}Since"] = cursor.since[:19]
+        return query
+
+    def _commit(self, key: str, cursor: FeedCursor):
+        with self.lock:
+            old = self.cursors.get(key)
+            if old is None or old.since != cursor.since or old.seen != cursor.seen:
+                self.cursors[key] = cursor
+                self.dirty = True
+
+    def _fetch(self, url: str, params: dict) -> dict:
+        # Bypasses the response cache: a poll must see the latest changes.
+        req = self.client._send("GET", url, params=params)
+        if req.status_code == 200:
+            return loads(req.content)
+        elif req.status_code == 204:
+            return {"data": []}
+        else:
+            raise APIError(req)
+
+    def _delta(self, key: str, url: str, params: dict = None) -> tuple:
+        old = self.cursor(key)
+        cursor = FeedCursor(old.since, old.seen) if old else FeedCursor()
+        params = params or {}
+        new = []
+        offset = 0
+        while True:
+            since = cursor.since
+            data = self._fetch(url, self._query(cursor, params, offset))["data"]
+            new += cursor.advance(data, self.field)
+            if len(data) < PAGE_SIZE:
+                break
+            offset = offset + len(data) if cursor.since == since else 0
+        return cursor, [resolve(Chapter, x, self.client) for x in new]
+
+    def delta(self, key: str, url: str, params: dict = None) -> List[Chapter]:
+        """Gets the chapters of a feed that are newer than its cursor, oldest first.
+        Pages are requested from the cursor rather than by growing offsets, so the offset window never runs out.
+        Offsets are only used to step over more than a page of chapters sharing the same timestamp."""
+        cursor, chapters = self._delta(key, url, params)
+        self._commit(key, cursor)
+        return chapters
+
+    def manga_chapters(self, mg: Manga, params: dict = None, includes: list = None) -> List[Chapter]:
+        """Gets the chapters of a Manga added or updated since the last call."""
+        return self.delta(f"manga:{mg.id}", f"{self.client.api}/manga/{mg.id}/feed", _feed_params(params, includes))
+
+    def user_updates(self, params: dict = None, includes: list = None) -> List[Chapter]:
+        """Gets the chapters added or updated in the currently logged user's manga feed since the last call."""
+        if not self.client.login_success:
+            raise NotLoggedInError
+        return self.delta("user:follows", f"{self.client.api}/user/follows/manga/feed",
+                          _feed_params(params, includes))
+
+    def poll(self, mangas: List[Manga], params: dict = None, includes: list = None) -> Dict[str, List[Chapter]]:
+        """Gets the chapters of many Mangas added or updated since the last cycle, by manga id.
+        Cursors only move, and are saved, once every feed was fetched: if one fails, the cycle can be retried."""
+        params = _feed_params(params, includes)
+        cursors, result = {}, {}
+        for mg in mangas:
+            key = f"manga:{mg.id}"
+            cursors[key], result[mg.id] = self._delta(key, f"{self.client.api}/manga/{mg.id}/feed", params)
+        for k, v in cursors.items():
+            self._commit(k, v)
+        self.save()
+        return result
+
+
+class AsyncFeedSync(FeedSync):
+    """Polls chapter feeds incrementally with an AsyncMangaDex client."""
+    async def _fetch(self, url: str, params: dict) -> dict:
+        req = await self.client._send("GET", url, params=params)
+        if req.status_code == 200:
+            return req.json()
+        elif req.status_code == 204:
+            return {"data": []}
+        else:
+            raise APIError(req)
+
+    async def _delta(self, key: str, url: str, params: dict = None) -> tuple:
+        old = self.cursor(key)
+        cursor = FeedCursor(old.since, old.seen) if old else FeedCursor()
+        params = params or {}
+        new = []
+        offset = 0
+        while True:
+            since = cursor.since
+            data = (await self._fetch(url, self._query(cursor, params, offset)))["data"]
+            new += cursor.advance(data, self.field)
+            if len(data) < PAGE_SIZE:
+                break
+            offset = offset + len(data) if cursor.since == since else 0
+        return cursor, [resolve(Chapter, x, self.client) for x in new]
+
+    async def delta(self, key: str, url: str, params: dict = None) -> List[Chapter]:
+        """Gets the chapters of a feed that are newer than its cursor, oldest first."""
+        cursor, chapters = await self._delta(key, url, params)
+        self._commit(key, cursor)
+        return chapters
+
+    async def manga_chapters(self, mg: Manga, params: dict = None, includes: list = None) -> List[Chapter]:
+        """Gets the chapters of a Manga added or updated since the last call."""
+        return await self.delta(f"manga:{mg.id}", f"{self.client.api}/manga/{mg.id}/feed",
+                                _feed_params(params, includes))
+
+    async def user_updates(self, params: dict = None, includes: list = None) -> List[Chapter]:
+        """Gets the chapters added or updated in the currently logged user's manga feed since the last call."""
+        if not self.client.login_success:
+            raise NotLoggedInError
+        return await self.delta("user:follows", f"{self.client.api}/user/follows/manga/feed",
+                                _feed_params(params, includes))
+
+    async def poll(self, mangas: List[Manga], params: dict = None,
+                   includes: list = None) -> Dict[str, List[Chapter]]:
+        """Gets the chapters of many Mangas added or updated since the last cycle, by manga id."""
+        params = _feed_params(params, includes)
+        cursors, result = {}, {}
+        for mg in mangas:
+            key = f"manga:{mg.id}"
+            cursors[key], result[mg.id] = await self._delta(key, f"{self.client.api}/manga/{mg.id}/feed", params)
+        for k, v in cursors.items():
+            self._commit(k, v)
+        self.save()
+        return result
+
+
+def _feed_params(params: dict = None, includes: list = None) -> dict:
+    includes = INCLUDE_ALL if not includes else includes
+    params = dict(params or {})
+    if includes:
+        params["includes[]"] = includes
+    return params
@@ -0,0 +1,107 @@
+import io
+import socket
+import requests
+from requests.adapters import HTTPAdapter, BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Server errors retried by the API adapter. 429 is left to the client's rate limiter.
+RETRY_STATUSES = (502, 503, 504)
+
+
+class PoolAdapter(HTTPAdapter):
+    """Represents a requests adapter with TCP keep-alive probes enabled on its pooled connections."""
+    __attrs__ = HTTPAdapter.__attrs__ + ["keep_alive"]
+
+    def __init__(self, keep_alive: bool = True, **kwargs):
+        self.keep_alive = keep_alive
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.keep_alive:
+            kwargs["socket_options"] = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        super().init_poolmanager(*args, **kwargs)
+
+
+class HTTP2Adapter(BaseAdapter):
+    """Represents a requests adapter sending requests over multiplexed HTTP/2 connections with httpx.
+    Responses are read entirely before being returned, including streamed ones.
+    TLS verification is set once, when the adapter is created; per-request certificates and proxies are ignored."""
+    def __init__(self, max_connections: int = 100, keep_alive: int = 20, retries: int = 0, verify=True):
+        if httpx is None:
+            raise ImportError("HTTP/2 support requires httpx. Install it with 'pip install MangaDex.py[http2]'.")
+        super().__init__()
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=keep_alive)
+        self.client = httpx.Client(transport=httpx.HTTPTransport(http2=True, verify=verify, limits=limits,
+                                                                 retries=retries))
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        try:
+            r = self.client.request(request.method, request.url, headers=dict(request.headers),
+                                    content=request.body, timeout=httpx.Timeout(timeout))
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(e, request=request)
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+        return self.build_response(request, r)
+
+    def build_response(self, req, r) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = r.status_code
+        resp.reason = r.reason_phrase
+        resp.headers = CaseInsensitiveDict(r.headers.items())
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp.raw = io.BytesIO(r.content)
+        resp._content = r.content
+        resp._content_consumed = True
+        resp.url = str(r.url)
+        resp.request = req
+        resp.connection = self
+        return resp
+
+    def close(self):
+        self.client.close()
+
+
+def retry(total: int, statuses=()) -> Retry:
+    """Builds a retry policy for connection errors and, on idempotent requests, read errors and statuses."""
+    kwargs = {"total": total, "connect": total, "read": total, "status": total, "backoff_factor": 0.5,
+              "status_forcelist": statuses, "respect_retry_after_header": False, "raise_on_status": False}
+    try:
+        return Retry(allowed_methods=frozenset(("GET", "HEAD", "OPTIONS")), **kwargs)
+    except TypeError:  # urllib3 < 1.26
+        return Retry(method_whitelist=frozenset(("GET", "HEAD", "OPTIONS")), **kwargs)
+
+
+def mount(session: requests.Session, api: str, pool_size: int = 32, hosts: int = 32, keep_alive: bool = True,
+          api_retries: int = 2, node_retries: int = 1, http2: bool = False):
+    """Replaces the adapters of a session.
+    API calls get their own pool, so page downloads never starve them of connections. Other hosts (MD@H nodes,
+    uploads) share an adapter keeping pools for up to `hosts` hosts, with up to `pool_size` connections each.
+    Only the API adapter retries server errors: failing MD@H nodes must be reported, not hidden."""
+    for adapter in session.adapters.values():
+        adapter.close()
+    session.adapters.clear()
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    else:
+        session.headers.pop("Connection", None)
+    if http2:
+        adapter = HTTP2Adapter(max_connections=pool_size * hosts, keep_alive=pool_size, retries=node_retries)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return
+    nodes = PoolAdapter(keep_alive, pool_connections=hosts, pool_maxsize=pool_size, max_retries=retry(node_retries))
+    session.mount("https://", nodes)
+    session.mount("http://", nodes)
+    session.mount(f"{api}/", PoolAdapter(keep_alive, pool_connections=1, pool_maxsize=pool_size,
+                                         max_retries=retry(api_retries, RETRY_STATUSES)))
@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from MangaDexPy import MangaDex, Chapter, Manga, decoding  # noqa: E402
+import payloads  # noqa: E402
+
+# Compares the available JSON backends on feed and search payloads: decoding alone, then decoding plus model building.
+
+
+def run(backend: str, bodies: list, obj, rounds: int) -> tuple:
+    decoding.use_backend(backend)
+    client = MangaDex()
+    decode_time = 0.0
+    build_time = 0.0
+    for _ in range(rounds):
+        client.entities.clear()
+        for body in bodies:
+            start = time.perf_counter()
+            resp = decoding.loads(body)
+            decoded = time.perf_counter()
+            for x in resp["data"]:
+                o = obj(x, client)
+                o.parent_manga if obj is Chapter else o.author
+            decode_time += decoded - start
+            build_time += time.perf_counter() - decoded
+    return decode_time / rounds, build_time / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the available JSON backends.")
+    parser.add_argument("--chapters", type=int, default=2000)
+    parser.add_argument("--mangas", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    suites = [("feed", payloads.encode(payloads.feed_pages(args.chapters)), Chapter),
+              ("search", payloads.encode(payloads.search_pages(args.mangas)), Manga)]
+    print(f"{'payload':<8} {'backend':<8} {'MB':>6} {'decode ms':>10} {'build ms':>9} {'MB/s':>8}")
+    for name, bodies, obj in suites:
+        size = sum(len(x) for x in bodies) / 1024 / 1024
+        for backend in decoding.BACKENDS:
+            decode_time, build_time = run(backend, bodies, obj, args.rounds)
+            print(f"{name:<8} {backend:<8} {size:>6.2f} {decode_time * 1000:>10.1f} {build_time * 1000:>9.1f} "
+                  f"{size / decode_time:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
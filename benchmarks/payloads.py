@@ -0,0 +1,103 @@
+import json
+import uuid
+import random
+
+# Builds responses shaped like the MangaDex API ones (feed pages with every relationship expanded), so benchmarks
+# can run offline and reproducibly. Sizes and field sets follow real /manga/{id}/feed and /manga responses.
+
+TAGS = ["Action", "Adventure", "Comedy", "Drama", "Fantasy", "Romance", "Slice of Life", "Isekai", "Historical",
+        "Mystery", "Psychological", "Sci-Fi", "Sports", "Tragedy", "Thriller", "Horror", "Mecha", "Music"]
+LANGUAGES = ["en", "fr", "es-la", "pt-br", "it", "de", "ru", "pl", "id", "vi"]
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128)))
+
+
+def _date(rng: random.Random, year: int = 2021) -> str:
+    return f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:" \
+           f"{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}+00:00"
+
+
+def tag(rng: random.Random, name: str) -> dict:
+    return {"id": _uuid(rng), "type": "tag",
+            "attributes": {"name": {"en": name}, "description": [], "group": "genre", "version": 1},
+            "relationships": []}
+
+
+def manga_attributes(rng: random.Random, index: int) -> dict:
+    return {"title": {"en": f"Benchmark Manga {index}"},
+            "altTitles": [{x: f"Alt title {index} ({x})"} for x in rng.sample(LANGUAGES, 4)],
+            "description": {x: "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8
+                            for x in rng.sample(LANGUAGES, 3)},
+            "isLocked": False,
+            "links": {"al": str(rng.randint(1, 99999)), "mu": str(rng.randint(1, 99999)),
+                      "mal": str(rng.randint(1, 99999))},
+            "originalLanguage": "ja", "lastVolume": str(rng.randint(1, 30)), "lastChapter": str(rng.randint(1, 300)),
+            "publicationDemographic": rng.choice(["shounen", "seinen", "shoujo", None]),
+            "status": rng.choice(["ongoing", "completed"]), "year": rng.randint(1990, 2021),
+            "contentRating": "safe", "tags": [tag(rng, x) for x in rng.sample(TAGS, 8)],
+            "state": "published", "createdAt": _date(rng, 2018), "updatedAt": _date(rng), "version": 4}
+
+
+def manga(rng: random.Random, index: int) -> dict:
+    return {"id": _uuid(rng), "type": "manga", "attributes": manga_attributes(rng, index),
+            "relationships": [
+                {"id": _uuid(rng), "type": "author",
+                 "attributes": {"name": f"Author {index}", "imageUrl": None, "biography": {}, "createdAt": _date(rng),
+                                "updatedAt": _date(rng), "version": 1}},
+                {"id": _uuid(rng), "type": "artist",
+                 "attributes": {"name": f"Artist {index}", "imageUrl": None, "biography": {}, "createdAt": _date(rng),
+                                "updatedAt": _date(rng), "version": 1}},
+                {"id": _uuid(rng), "type": "cover_art",
+                 "attributes": {"description": "", "volume": "1", "fileName": f"{_uuid(rng)}.jpg",
+                                "createdAt": _date(rng), "updatedAt": _date(rng), "version": 1}}
+            ]}
+
+
+def group(rng: random.Random, index: int) -> dict:
+    return {"id": _uuid(rng), "type": "scanlation_group",
+            "attributes": {"name": f"Group {index}", "altNames": [], "website": None, "ircServer": None,
+                           "ircChannel": None, "discord": None, "contactEmail": None, "description": None,
+                           "locked": False, "official": False, "verified": False, "createdAt": _date(rng),
+                           "updatedAt": _date(rng), "version": 1}}
+
+
+def user(rng: random.Random, index: int) -> dict:
+    return {"id": _uuid(rng), "type": "user",
+            "attributes": {"username": f"uploader{index}", "roles": ["ROLE_MEMBER"], "version": 1}}
+
+
+def chapter(rng: random.Random, index: int, parent: dict, groups: list, users: list) -> dict:
+    return {"id": _uuid(rng), "type": "chapter",
+            "attributes": {"volume": str(index // 10 + 1), "chapter": str(index + 1), "title": f"Chapter {index + 1}",
+                           "translatedLanguage": rng.choice(LANGUAGES), "externalUrl": None,
+                           "publishAt": _date(rng), "createdAt": _date(rng), "updatedAt": _date(rng),
+                           "pages": rng.randint(15, 40), "version": 1},
+            "relationships": [
+                {"id": parent["id"], "type": "manga", "attributes": parent["attributes"]},
+                rng.choice(groups), rng.choice(users)
+            ]}
+
+
+def feed_pages(chapters: int = 1000, page_size: int = 100, seed: int = 0) -> list:
+    """Builds the pages of a manga feed, as returned by /manga/{id}/feed with every include."""
+    rng = random.Random(seed)
+    parent = manga(rng, 0)
+    groups = [group(rng, x) for x in range(5)]
+    users = [user(rng, x) for x in range(5)]
+    data = [chapter(rng, x, parent, groups, users) for x in range(chapters)]
+    return [{"result": "ok", "response": "collection", "data": data[x:x + page_size], "limit": page_size,
+             "offset": x, "total": chapters} for x in range(0, chapters, page_size)]
+
+
+def search_pages(mangas: int = 500, page_size: int = 100, seed: int = 0) -> list:
+    """Builds the pages of a manga search, as returned by /manga with every include."""
+    rng = random.Random(seed)
+    data = [manga(rng, x) for x in range(mangas)]
+    return [{"result": "ok", "response": "collection", "data": data[x:x + page_size], "limit": page_size,
+             "offset": x, "total": mangas} for x in range(0, mangas, page_size)]
+
+
+def encode(pages: list) -> list:
+    return [json.dumps(x).encode() for x in pages]
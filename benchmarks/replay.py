@@ -0,0 +1,115 @@
+import json
+import time
+import random
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import payloads
+
+# A local HTTP server replaying MangaDex API and MD@H responses, with optional latency and 429 injection.
+# It serves the payloads from payloads.py, so benchmarks never touch the live API.
+
+
+class ReplayData:
+    """Holds the responses served by the replay server."""
+    def __init__(self, chapters: int = 2000, mangas: int = 500, pages: int = 20, image_size: int = 256 * 1024):
+        self.feed = [x for page in payloads.feed_pages(chapters) for x in page["data"]]
+        self.mangas = [x for page in payloads.search_pages(mangas) for x in page["data"]]
+        self.chapters = {x["id"]: x for x in self.feed}
+        self.pages = pages
+        self.image = bytes(random.Random(0).getrandbits(8) for _ in range(min(image_size, 4096))) * \
+            (image_size // 4096 or 1)
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Represents the replay server. Use `url` as the client's api and net_api."""
+    daemon_threads = True
+
+    def __init__(self, data: ReplayData, latency: float = 0, error_rate: float = 0, port: int = 0):
+        super().__init__(("127.0.0.1", port), ReplayHandler)
+        self.data = data
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = random.Random(0)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def start(self) -> "ReplayServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _inject(self) -> bool:
+        with self.server.lock:
+            self.server.requests += 1
+            throttle = self.server.error_rate and self.server.rng.random() < self.server.error_rate
+            if throttle:
+                self.server.throttled += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if throttle:
+            self._send(429, b'{"result": "error"}', {"X-RateLimit-Retry-After": str(time.time() + 0.05)})
+        return bool(throttle)
+
+    def _send(self, status: int, body: bytes, headers: dict = None, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _collection(self, data: list, query: dict):
+        limit = int(query.get("limit", ["10"])[0])
+        offset = int(query.get("offset", ["0"])[0])
+        body = {"result": "ok", "response": "collection", "data": data[offset:offset + limit], "limit": limit,
+                "offset": offset, "total": len(data)}
+        self._send(200, json.dumps(body).encode())
+
+    def do_GET(self):
+        if self._inject():
+            return
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        parts = url.path.strip("/").split("/")
+        data = self.server.data
+        if parts[0] == "data" or parts[0] == "data-saver":
+            return self._send(200, data.image, {"X-Cache": "HIT"}, "image/png")
+        elif parts == ["manga"]:
+            return self._collection(data.mangas, query)
+        elif len(parts) == 3 and parts[0] == "manga" and parts[2] == "feed":
+            return self._collection(data.feed, query)
+        elif parts == ["chapter"]:
+            ids = query.get("ids[]", [])
+            return self._collection([data.chapters[x] for x in ids if x in data.chapters], query)
+        elif len(parts) == 2 and parts[0] == "chapter" and parts[1] in data.chapters:
+            return self._send(200, json.dumps({"result": "ok", "data": data.chapters[parts[1]]}).encode())
+        elif len(parts) == 3 and parts[:2] == ["at-home", "server"]:
+            files = [f"{x + 1}-{'0' * 8}.png" for x in range(data.pages)]
+            body = {"result": "ok", "baseUrl": self.server.url,
+                    "chapter": {"hash": parts[2].replace("-", ""), "data": files,
+                                "dataSaver": [x.replace(".png", ".jpg") for x in files]}}
+            return self._send(200, json.dumps(body).encode())
+        self._send(404, b'{"result": "error"}')
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self._inject():
+            return
+        self._send(200, b'{"result": "ok"}')
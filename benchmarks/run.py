@@ -0,0 +1,111 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+import tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from MangaDexPy import MangaDex, downloader  # noqa: E402
+from MangaDexPy.ratelimit import RateLimiter  # noqa: E402
+from replay import ReplayData, ReplayServer  # noqa: E402
+
+# Runs the client against the replay server and reports throughput, per-request latency percentiles and peak memory
+# for search, feed pagination, bulk chapter fetches and chapter downloads.
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def client_for(server: ReplayServer, args, latencies: list) -> MangaDex:
+    """Builds a client talking to the replay server, recording the duration of each of its requests."""
+    cli = MangaDex()
+    cli.api = server.url
+    cli.net_api = server.url
+    cli.configure_transport()
+    cli.limiter = RateLimiter({}) if not args.rate else cli.limiter
+    if args.rate:
+        cli.rate_limit = 1 / args.rate
+    cli.page_workers = args.page_workers
+    cli.hooks.register("request_end", lambda event, info: latencies.append(info["duration"]))
+    return cli
+
+
+def scenario_search(cli, data, args):
+    return len(cli.search("manga", {}, limit=0))
+
+
+def scenario_feed(cli, data, args):
+    return len(cli.get_manga_chapters(cli.search("manga", {}, limit=1)[0]))
+
+
+def scenario_bulk(cli, data, args):
+    return len(cli.get_chapters(list(data.chapters)[:args.bulk]))
+
+
+def scenario_download(cli, data, args):
+    chapter = cli.get_chapter(next(iter(data.chapters)))
+    path = tempfile.mkdtemp()
+    try:
+        downloader.threaded_dl_chapter(chapter, path, workers=args.workers)
+        return data.pages
+    finally:
+        shutil.rmtree(path)
+
+
+SCENARIOS = {"search": scenario_search, "feed": scenario_feed, "bulk": scenario_bulk, "download": scenario_download}
+
+
+def measure(name: str, server: ReplayServer, data: ReplayData, args) -> dict:
+    latencies = []
+    items = 0
+    requests = server.requests
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        items += SCENARIOS[name](client_for(server, args, latencies), data, args)
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"scenario": name, "items/s": items / total, "req": (server.requests - requests) / args.rounds,
+            "p50 ms": percentile(latencies, 50) * 1000, "p95 ms": percentile(latencies, 95) * 1000,
+            "p99 ms": percentile(latencies, 99) * 1000, "peak MB": peak / 1024 / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the client against a local replay server.")
+    parser.add_argument("scenarios", nargs="*", help=f"scenarios to run, among {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--chapters", type=int, default=2000, help="chapters in the replayed feed")
+    parser.add_argument("--mangas", type=int, default=500, help="mangas in the replayed search results")
+    parser.add_argument("--pages", type=int, default=20, help="pages per downloaded chapter")
+    parser.add_argument("--image-size", type=int, default=256 * 1024, help="bytes per page image")
+    parser.add_argument("--bulk", type=int, default=500, help="chapters fetched by id in the bulk scenario")
+    parser.add_argument("--latency", type=float, default=0.0, help="injected latency per request, in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with a 429")
+    parser.add_argument("--rate", type=float, default=0.0, help="client API rate limit (requests/s), 0 to disable")
+    parser.add_argument("--page-workers", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=8, help="download pool size")
+    args = parser.parse_args()
+    args.scenarios = args.scenarios or list(SCENARIOS)
+    unknown = [x for x in args.scenarios if x not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    data = ReplayData(args.chapters, args.mangas, args.pages, args.image_size)
+    server = ReplayServer(data, args.latency, args.error_rate).start()
+    try:
+        results = [measure(x, server, data, args) for x in args.scenarios]
+    finally:
+        server.stop()
+    columns = ["scenario", "items/s", "req", "p50 ms", "p95 ms", "p99 ms", "peak MB"]
+    print("  ".join(f"{x:>10}" for x in columns))
+    for r in results:
+        print("  ".join(f"{r[x]:>10.1f}" if isinstance(r[x], float) else f"{r[x]:>10}" for x in columns))
+    if args.error_rate:
+        print(f"{server.throttled} of {server.requests} requests were answered with a 429.")
+
+
+if __name__ == "__main__":
+    main()
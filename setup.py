@@ -22,6 +22,11 @@ setup(name='MangaDex.py',
       install_requires=[
             'requests>=2.25.0',
       ],
+      extras_require={
+            'async': ['aiohttp>=3.7.0'],
+            'fast': ['orjson>=3.5.0'],
+            'http2': ['httpx[http2]>=0.18.0'],
+      },
       classifiers=[
             'License :: OSI Approved :: MIT License',
             'Operating System :: OS Independent',
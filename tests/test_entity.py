@@ -0,0 +1,53 @@
+import unittest
+from types import SimpleNamespace
+from MangaDexPy.entity import EntityMap
+from MangaDexPy.manga import Manga
+from MangaDexPy.chapter import Chapter
+
+
+def manga(updated, title="Title", relationships=None):
+    data = {"id": "m-1", "type": "manga",
+            "attributes": {"title": {"en": title}, "originalLanguage": "ja", "tags": [], "updatedAt": updated}}
+    if relationships is not None:
+        data["relationships"] = relationships
+    return data
+
+
+def author(uid):
+    return {"id": uid, "type": "author", "attributes": {"name": uid, "updatedAt": "2021-01-01T00:00:00+00:00"}}
+
+
+class EntityMapTest(unittest.TestCase):
+    def setUp(self):
+        self.client = SimpleNamespace(entities=EntityMap())
+
+    def test_embedded_copy_keeps_relationships(self):
+        full = self.client.entities.resolve(Manga, manga("2021-01-01T00:00:00+00:00", relationships=[
+            author("a-1"), dict(author("a-2"), type="artist"),
+            {"id": "c-1", "type": "cover_art", "attributes": {"fileName": "x.jpg"}}]), self.client)
+        # Mangas expanded in a chapter feed have no relationships key, but may be newer.
+        chapter = Chapter({"id": "ch-1", "type": "chapter",
+                           "attributes": {"translatedLanguage": "en", "updatedAt": "2021-01-01T00:00:00+00:00"},
+                           "relationships": [dict(manga("2021-02-01T00:00:00+00:00", "New title"), type="manga")]},
+                          self.client)
+        self.assertIs(chapter.parent_manga, full)
+        self.assertEqual(full.title, {"en": "New title"})
+        self.assertEqual([x.id for x in full.author], ["a-1"])
+        self.assertEqual([x.id for x in full.artist], ["a-2"])
+        self.assertEqual(full.cover.id, "c-1")
+
+    def test_newer_full_copy_replaces_relationships(self):
+        obj = self.client.entities.resolve(Manga, manga("2021-01-01T00:00:00+00:00", relationships=[
+            author("a-1")]), self.client)
+        self.client.entities.resolve(Manga, manga("2021-02-01T00:00:00+00:00", relationships=[
+            author("a-3")]), self.client)
+        self.assertEqual([x.id for x in obj.author], ["a-3"])
+
+    def test_older_copy_is_ignored(self):
+        obj = self.client.entities.resolve(Manga, manga("2021-02-01T00:00:00+00:00"), self.client)
+        self.client.entities.resolve(Manga, manga("2021-01-01T00:00:00+00:00", "Old title"), self.client)
+        self.assertEqual(obj.title, {"en": "Title"})
+
+
+if __name__ == "__main__":
+    unittest.main()